@@ -15,6 +15,20 @@ class TelegramAlerts:
     def __init__(self, bot_token: str, chat_id: str):
         self.bot_token = bot_token
         self.chat_id = chat_id
+        self.bot = None  # created on first use and reused for every alert
+
+    async def deliver(self, message: str):
+        """
+        Sends message to chat_id, raising TelegramError on failure so callers can retry.
+        """
+        if self.bot is None:
+            self.bot = Bot(token=self.bot_token)
+        # python-telegram-bot v20+ has async methods, so we can await send_message
+        await self.bot.send_message(
+            chat_id=self.chat_id,
+            text=message,
+            parse_mode=ParseMode.MARKDOWN
+        )
 
     async def send_alert(self, message: str):
         """
@@ -22,12 +36,6 @@ class TelegramAlerts:
         Uses python-telegram-bot in asynchronous style.
         """
         try:
-            bot = Bot(token=self.bot_token)
-            # python-telegram-bot v20+ has async methods, so we can await send_message
-            await bot.send_message(
-                chat_id=self.chat_id,
-                text=message,
-                parse_mode=ParseMode.MARKDOWN
-            )
+            await self.deliver(message)
         except TelegramError as e:
             logger.error(f"Failed to send alert: {e}")
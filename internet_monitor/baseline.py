@@ -0,0 +1,108 @@
+import logging
+
+from internet_monitor.timekeeping import local_now
+
+logger = logging.getLogger(__name__)
+
+# Fallback used for a target until its own baseline has warmed up
+HIGH_PING_THRESHOLD = 150  # ms
+
+BASELINE_ALPHA = 0.01          # EWMA weight of each new sample
+HIGH_SAMPLE_ALPHA = 0.0002     # weight of a flagged sample; only the mean moves, and slowly
+DEVIATION_MULTIPLIER = 4       # how many mean absolute deviations count as "high"
+MIN_MARGIN_MS = 10             # never flag less than this above the baseline mean
+WARMUP_SAMPLES = 30            # samples a bucket needs before it is trusted
+
+ALL_HOURS = -1  # bucket holding the target-wide baseline (all hours of the week)
+
+
+def hour_of_week(now=None):
+    """
+    Return the bucket index (0-167) for the given local time, Monday 00:00 being 0.
+    """
+    now = now or local_now()
+    return now.weekday() * 24 + now.hour
+
+
+class LatencyBaseline:
+    """
+    Streaming per-target latency baseline, kept per hour-of-week plus a target-wide bucket.
+    Each bucket is an EWMA of the RTT and of its absolute deviation, so memory is O(1)
+    per bucket and each sample costs two dict lookups.
+    """
+
+    def __init__(self):
+        # (target, bucket) -> [mean, deviation, count]
+        self.buckets = {}
+        self.dirty = set()
+        self.configure()
+
+    def configure(self, fallback_threshold=HIGH_PING_THRESHOLD,
+                  deviation_multiplier=DEVIATION_MULTIPLIER, min_margin_ms=MIN_MARGIN_MS):
+        """
+        Set the detection thresholds; takes effect from the next sample.
+        """
+        self.fallback_threshold = fallback_threshold
+        self.deviation_multiplier = deviation_multiplier
+        self.min_margin_ms = min_margin_ms
+
+    def load(self, rows):
+        """
+        Warm up from persisted (target, bucket, mean, deviation, count) rows.
+        """
+        for target, bucket, mean, deviation, count in rows:
+            self.buckets[(target, bucket)] = [mean, deviation, count]
+        logger.info(f"Loaded {len(rows)} latency baseline buckets.")
+
+    def snapshot(self, dirty_only=True):
+        """
+        Return rows suitable for persisting, and clear the dirty set.
+        """
+        keys = self.dirty if dirty_only else self.buckets.keys()
+        rows = [(target, bucket, *self.buckets[(target, bucket)]) for target, bucket in keys]
+        self.dirty = set()
+        return rows
+
+    def threshold(self, target, bucket):
+        """
+        Return (limit_ms, warmed_up): the RTT above which a sample is considered high for this
+        target and hour, and whether that limit comes from the target's own baseline.
+        """
+        for key in ((target, bucket), (target, ALL_HOURS)):
+            state = self.buckets.get(key)
+            if state is not None and state[2] >= WARMUP_SAMPLES:
+                mean, deviation, _ = state
+                return mean + max(self.deviation_multiplier * deviation, self.min_margin_ms), True
+        return self.fallback_threshold, False
+
+    def observe(self, target, ping_time, bucket):
+        """
+        Feed one RTT sample and return True if it is high relative to the target's own normal.
+        Returns None when there is no RTT (target unreachable).
+        """
+        if ping_time is None:
+            return None
+        limit, warmed_up = self.threshold(target, bucket)
+        is_high = ping_time > limit
+        # A flagged sample leaves the deviation alone and nudges the mean with a much smaller
+        # weight: a long incident keeps alerting, while a permanent change of link (e.g. a
+        # move to satellite) is still adopted, over about a month of samples per hour bucket
+        incident = is_high and warmed_up
+        self._update((target, bucket), ping_time, incident)
+        self._update((target, ALL_HOURS), ping_time, incident)
+        return is_high
+
+    def _update(self, key, sample, incident=False):
+        state = self.buckets.get(key)
+        if state is None:
+            self.buckets[key] = [sample, 0.0, 1]
+        elif incident:
+            state[0] += HIGH_SAMPLE_ALPHA * (sample - state[0])
+        else:
+            mean, deviation, count = state
+            # Use a faster EWMA while warming up so early samples are not swamped by the first one
+            alpha = max(BASELINE_ALPHA, 1.0 / (count + 1))
+            state[1] = deviation + alpha * (abs(sample - mean) - deviation)
+            state[0] = mean + alpha * (sample - mean)
+            state[2] = count + 1
+        self.dirty.add(key)
@@ -1,54 +1,75 @@
-from datetime import datetime
 import logging
 
-logger = logging.getLogger(__name__)
+from internet_monitor.baseline import HIGH_PING_THRESHOLD
+from internet_monitor.quality import LinkQuality
+from internet_monitor.settings import DEFAULT_TARGETS
+from internet_monitor.timekeeping import monotonic
 
-HIGH_PING_THRESHOLD = 150  # ms
+logger = logging.getLogger(__name__)
 
 class DailyStats:
     """
     Collects daily statistics: uptime, downtime, high ping counts, etc.
     """
 
-    def __init__(self):
+    def __init__(self, servers=None):
+        self.servers = list(servers or DEFAULT_TARGETS)
         self.uptime_seconds = 0
         self.downtime_seconds = 0
         self.high_ping_count = 0
         self.high_ping_seconds = 0
         self.internet_failures = 0
-        self.last_update_time = datetime.now()
+        self.last_update_time = monotonic()
         self.is_high_ping = False
         self.is_down = False
         self.total_pings = 0
         self.failed_pings = 0
-        self.ping_times = []
+        # Running RTT figures; individual samples are not kept so memory stays flat
+        self.ping_sum = 0.0
+        self.ping_count = 0
+        self.max_ping = 0
         self.longest_downtime = 0
         self.system_downtime_seconds = 0
         self.current_downtime_start = None
-        self.server_stats = {
-            "1.1.1.1": {"downtime": 0, "high_pings": 0},
-            "8.8.8.8": {"downtime": 0, "high_pings": 0}
-        }
+        self.server_stats = {server: {"downtime": 0, "high_pings": 0} for server in self.servers}
+        # Jitter / loss-burst / MOS per server, and for the connection as a whole
+        # (best RTT of the cycle, lost only when every server failed)
+        self.server_quality = {server: LinkQuality() for server in self.server_stats}
+        self.link_quality = LinkQuality()
 
     def reset(self):
         """
-        Reset the daily statistics.
+        Reset the daily statistics, keeping the current server list.
+        """
+        self.__init__(self.servers)
+
+    def set_servers(self, servers):
+        """
+        Switch to a new server list. Added servers start with empty figures; removed servers
+        keep theirs until the next reset so today's report still accounts for them.
         """
-        self.__init__()
+        for server in servers:
+            if server not in self.server_stats:
+                self.server_stats[server] = {"downtime": 0, "high_pings": 0}
+                self.server_quality[server] = LinkQuality()
+        self.servers = list(servers)
 
-    def update(self, is_up, is_high_ping, ping_times, server_status):
+    def update(self, is_up, is_high_ping, ping_times, server_status, high_ping_flags=None):
         """
         Update the stats with the latest monitor cycle results.
+        high_ping_flags holds the per-server verdicts from the latency baseline; without it
+        each server's ping is compared against the fixed HIGH_PING_THRESHOLD.
         """
-        now = datetime.now()
-        elapsed = (now - self.last_update_time).total_seconds()
+        # Elapsed time comes from the monotonic clock so wall-clock steps don't skew it
+        now = monotonic()
+        elapsed = now - self.last_update_time
 
         # Uptime/Downtime
         if is_up:
             self.uptime_seconds += elapsed
             if self.is_down:
                 self.internet_failures += 1
-                downtime = (now - self.current_downtime_start).total_seconds()
+                downtime = now - self.current_downtime_start
                 self.longest_downtime = max(self.longest_downtime, downtime)
                 self.is_down = False
                 self.current_downtime_start = None
@@ -70,15 +91,34 @@ class DailyStats:
         # Ping times
         self.total_pings += len(ping_times)
         self.failed_pings += sum(1 for s in server_status if not s)
-        self.ping_times.extend(filter(None, ping_times))
+        for ping_time in ping_times:
+            if ping_time:
+                self.ping_sum += ping_time
+                self.ping_count += 1
+                if ping_time > self.max_ping:
+                    self.max_ping = ping_time
 
         # Per-server stats
-        for server, status in zip(self.server_stats.keys(), server_status):
+        if high_ping_flags is None:
+            high_ping_flags = [p is not None and p > HIGH_PING_THRESHOLD for p in ping_times]
+        for server, status, high in zip(self.servers, server_status, high_ping_flags):
             if not status:
                 self.server_stats[server]["downtime"] += elapsed
-            elif any(p is not None and p > HIGH_PING_THRESHOLD for p in ping_times):
+            elif high:
                 self.server_stats[server]["high_pings"] += 1
 
+        # Quality metrics (a reply without a parsable RTT can't be timed, so it is skipped)
+        answered = [p for p, s in zip(ping_times, server_status) if s and p is not None]
+        for server, status, ping_time in zip(self.servers, server_status, ping_times):
+            if not status:
+                self.server_quality[server].add(None)
+            elif ping_time is not None:
+                self.server_quality[server].add(ping_time)
+        if answered:
+            self.link_quality.add(min(answered))
+        elif not is_up:
+            self.link_quality.add(None)
+
         self.last_update_time = now
 
     def get_summary(self):
@@ -89,10 +129,11 @@ class DailyStats:
         uptime_percentage = (self.uptime_seconds / total_time * 100) if total_time > 0 else 0
         downtime_percentage = 100 - uptime_percentage
         packet_loss = (self.failed_pings / self.total_pings * 100) if self.total_pings > 0 else 0
-        average_ping = sum(self.ping_times) / len(self.ping_times) if self.ping_times else 0
-        max_ping = max(self.ping_times) if self.ping_times else 0
+        average_ping = self.ping_sum / self.ping_count if self.ping_count else 0
+        max_ping = self.max_ping
         most_stable_server = min(self.server_stats.items(),
                                  key=lambda x: x[1]["downtime"] + x[1]["high_pings"])[0]
+        quality = self.link_quality.summary()
 
         return {
             "uptime": self.uptime_seconds,
@@ -109,5 +150,13 @@ class DailyStats:
             "max_ping": max_ping,
             "system_downtime": self.system_downtime_seconds,
             "most_stable_server": most_stable_server,
-            "longest_downtime": self.longest_downtime
+            "longest_downtime": self.longest_downtime,
+            "jitter": quality["jitter"],
+            "mos": quality["mos"],
+            "max_loss_burst": quality["max_loss_burst"],
+            "mean_loss_burst": quality["mean_loss_burst"],
+            "burst_ratio": quality["burst_ratio"],
+            "server_quality": {
+                server: q.summary() for server, q in self.server_quality.items()
+            }
         }
@@ -1,6 +1,8 @@
 import sqlite3
 import logging
 
+from internet_monitor.timekeeping import now_ns
+
 logger = logging.getLogger(__name__)
 
 DATABASE_FILE = "internet_monitor.db"
@@ -32,57 +34,224 @@ class DatabaseManager:
             logger.info("Database connection closed.")
 
 
+def _add_missing_columns(cursor, table, columns):
+    """
+    Add any of the given (name, type) columns that an older database is missing.
+    """
+    cursor.execute(f"PRAGMA table_info({table})")
+    existing = {row[1] for row in cursor.fetchall()}
+    for name, col_type in columns:
+        if name not in existing:
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN {name} {col_type}")
+
+
+SCHEMA_VERSION = 1  # 1: integer epoch-nanosecond time columns
+
+# SQL expression converting a legacy local-time string column to epoch nanoseconds
+_LOCAL_TEXT_TO_NS = "COALESCE(CAST(strftime('%s', {}, 'utc') AS INTEGER), 0) * 1000000000"
+
+
+def _create_tables(cursor):
+    """
+    Create the current schema. All time columns are integer epoch nanoseconds (see timekeeping.py).
+    """
+    # Event log table
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS event_log (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            event_type TEXT NOT NULL,
+            ts INTEGER NOT NULL,
+            details TEXT
+        )
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_event_log_ts ON event_log (ts)")
+
+    # Hourly event counts, kept after the raw event_log rows expire (see retention.py)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS event_log_hourly (
+            hour INTEGER NOT NULL,
+            event_type TEXT NOT NULL,
+            count INTEGER NOT NULL,
+            PRIMARY KEY (hour, event_type)
+        )
+    """)
+
+    # Daily stats table, one row per report snapshot
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS daily_stats (
+            ts INTEGER PRIMARY KEY,
+            uptime_seconds REAL,
+            downtime_seconds REAL,
+            high_ping_count INTEGER,
+            high_ping_seconds REAL,
+            internet_failures INTEGER,
+            total_pings INTEGER,
+            failed_pings INTEGER,
+            average_ping REAL,
+            max_ping REAL,
+            longest_downtime REAL,
+            system_downtime_seconds REAL,
+            jitter REAL,
+            mos REAL,
+            max_loss_burst INTEGER,
+            mean_loss_burst REAL,
+            burst_ratio REAL
+        )
+    """)
+
+    # Per-server quality rollups, written alongside each daily_stats row
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS daily_quality (
+            ts INTEGER NOT NULL,
+            target TEXT NOT NULL,
+            packet_loss REAL,
+            average_rtt REAL,
+            jitter REAL,
+            max_loss_burst INTEGER,
+            mean_loss_burst REAL,
+            ge_p REAL,
+            ge_r REAL,
+            mos REAL,
+            PRIMARY KEY (ts, target)
+        )
+    """)
+
+    # Heartbeat table
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS heartbeat (
+            id INTEGER PRIMARY KEY CHECK (id=1),
+            last_heartbeat INTEGER NOT NULL
+        )
+    """)
+
+    # Per-target latency baselines (see baseline.py), persisted across restarts
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS latency_baseline (
+            target TEXT NOT NULL,
+            bucket INTEGER NOT NULL,
+            mean REAL NOT NULL,
+            deviation REAL NOT NULL,
+            samples INTEGER NOT NULL,
+            PRIMARY KEY (target, bucket)
+        )
+    """)
+
+
+# Tables rebuilt by _migrate_to_integer_time:
+# (table, new time column, legacy expression for it, legacy columns copied as they are)
+_LEGACY_TABLES = [
+    ("event_log", "ts", "timestamp", [
+        ("event_type", "TEXT"), ("details", "TEXT"),
+    ]),
+    ("event_log_hourly", "hour", "hour || ':00'", [
+        ("event_type", "TEXT"), ("count", "INTEGER"),
+    ]),
+    ("daily_stats", "ts", "date || ' ' || time", [
+        ("uptime_seconds", "REAL"), ("downtime_seconds", "REAL"), ("high_ping_count", "INTEGER"),
+        ("high_ping_seconds", "REAL"), ("internet_failures", "INTEGER"), ("total_pings", "INTEGER"),
+        ("failed_pings", "INTEGER"), ("average_ping", "REAL"), ("max_ping", "REAL"),
+        ("longest_downtime", "REAL"), ("system_downtime_seconds", "REAL"), ("jitter", "REAL"),
+        ("mos", "REAL"), ("max_loss_burst", "INTEGER"), ("mean_loss_burst", "REAL"),
+        ("burst_ratio", "REAL"),
+    ]),
+    ("daily_quality", "ts", "date || ' ' || time", [
+        ("target", "TEXT"), ("packet_loss", "REAL"), ("average_rtt", "REAL"), ("jitter", "REAL"),
+        ("max_loss_burst", "INTEGER"), ("mean_loss_burst", "REAL"), ("ge_p", "REAL"),
+        ("ge_r", "REAL"), ("mos", "REAL"),
+    ]),
+    ("heartbeat", "last_heartbeat", "last_heartbeat", [
+        ("id", "INTEGER"),
+    ]),
+]
+
+# Legacy columns the time expressions read
+_LEGACY_TIME_COLUMNS = {
+    "event_log": [("timestamp", "DATETIME")],
+    "event_log_hourly": [("hour", "TEXT")],
+    "daily_stats": [("date", "DATE"), ("time", "TIME")],
+    "daily_quality": [("date", "DATE"), ("time", "TIME")],
+    "heartbeat": [("last_heartbeat", "DATETIME")],
+}
+
+
+def _migrate_to_integer_time(cursor):
+    """
+    Rebuild tables from databases before SCHEMA_VERSION 1, which stored local-time strings
+    (datetime('now','localtime'), separate date/time columns), with integer epoch nanoseconds.
+    Must run inside a transaction (see init_db) so a failure leaves the old tables untouched.
+    """
+    cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table'")
+    existing = {row[0] for row in cursor.fetchall()}
+    migrated = []
+    for table, _, _, _ in _LEGACY_TABLES:
+        if f"{table}_legacy" in existing:
+            # Left behind by an earlier, non-transactional migration attempt: copy from it
+            # into whatever the new table has collected since
+            migrated.append(table)
+        elif table in existing:
+            cursor.execute(f"ALTER TABLE {table} RENAME TO {table}_legacy")
+            migrated.append(table)
+    if not migrated:
+        return
+
+    _create_tables(cursor)
+    for table, time_column, time_expression, columns in _LEGACY_TABLES:
+        if table not in migrated:
+            continue
+        # Older databases may lack columns added later; they come across as NULL
+        _add_missing_columns(cursor, f"{table}_legacy", _LEGACY_TIME_COLUMNS[table] + columns)
+        names = ", ".join(name for name, _ in columns)
+        cursor.execute(f"""
+            INSERT OR IGNORE INTO {table} ({time_column}, {names})
+            SELECT {_LOCAL_TEXT_TO_NS.format(time_expression)}, {names}
+            FROM {table}_legacy ORDER BY rowid
+        """)
+        cursor.execute(f"DROP TABLE {table}_legacy")
+    logger.info(f"Migrated {', '.join(migrated)} to integer timestamps.")
+
+
 def init_db(db_manager: DatabaseManager):
     """
-    Create the required tables if they do not already exist, using local time instead of UTC.
+    Create the required tables if they do not already exist, migrating older
+    databases that stored local-time strings to integer epoch-nanosecond columns.
+    A failed migration is rolled back and re-raised: nothing else can work against
+    the old schema, so the caller must not carry on.
     """
     conn = db_manager.connect()
-    try:
-        cursor = conn.cursor()
+    cursor = conn.cursor()
 
-        # Event log table (store local time by default)
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS event_log (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                event_type TEXT NOT NULL,
-                timestamp DATETIME DEFAULT (datetime('now','localtime')),
-                details TEXT
-            )
-        """)
+    # Let retention give space back with incremental_vacuum. An existing database
+    # only picks up the new mode after a one-off full VACUUM.
+    try:
+        cursor.execute("PRAGMA auto_vacuum")
+        if cursor.fetchone()[0] != 2:
+            cursor.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            cursor.execute("VACUUM")
+    except sqlite3.Error as e:
+        logger.error(f"Could not switch the database to incremental auto_vacuum: {e}")
 
-        # Daily stats table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS daily_stats (
-                date DATE,
-                time TIME,
-                uptime_seconds REAL,
-                downtime_seconds REAL,
-                high_ping_count INTEGER,
-                high_ping_seconds REAL,
-                internet_failures INTEGER,
-                total_pings INTEGER,
-                failed_pings INTEGER,
-                average_ping REAL,
-                max_ping REAL,
-                longest_downtime REAL,
-                system_downtime_seconds REAL,
-                PRIMARY KEY (date, time)
-            )
-        """)
+    cursor.execute("PRAGMA user_version")
+    if cursor.fetchone()[0] < SCHEMA_VERSION:
+        # One transaction for the renames, copies and the version bump: on any error
+        # the database is left exactly as it was and the migration is retried next start
+        cursor.execute("BEGIN")
+        try:
+            _migrate_to_integer_time(cursor)
+            cursor.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+            conn.commit()
+        except sqlite3.Error as e:
+            conn.rollback()
+            logger.error(f"Database migration failed, database left unchanged: {e}")
+            raise
 
-        # Heartbeat table (store local time by default)
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS heartbeat (
-                id INTEGER PRIMARY KEY CHECK (id=1),
-                last_heartbeat DATETIME DEFAULT (datetime('now','localtime'))
-            )
-        """)
+    try:
+        _create_tables(cursor)
 
         # Insert heartbeat row if not present
         cursor.execute("""
             INSERT OR IGNORE INTO heartbeat (id, last_heartbeat)
-            VALUES (1, datetime('now','localtime'))
-        """)
+            VALUES (1, ?)
+        """, (now_ns(),))
 
         conn.commit()
         logger.info("Database initialized successfully.")
@@ -92,13 +261,13 @@ def init_db(db_manager: DatabaseManager):
 
 def log_event(db_manager: DatabaseManager, event_type, details):
     """
-    Log an event into the event_log table, which defaults to local time already.
+    Log an event into the event_log table, stamped with epoch nanoseconds.
     """
     try:
         conn = db_manager.connect()
         cursor = conn.cursor()
-        cursor.execute("INSERT INTO event_log (event_type, details) VALUES (?, ?)",
-                       (event_type, details))
+        cursor.execute("INSERT INTO event_log (event_type, ts, details) VALUES (?, ?, ?)",
+                       (event_type, now_ns(), details))
         conn.commit()
         logger.info(f"Event: {event_type} | Details: {details}")
     except sqlite3.Error as e:
@@ -107,21 +276,56 @@ def log_event(db_manager: DatabaseManager, event_type, details):
 
 def update_heartbeat(db_manager: DatabaseManager):
     """
-    Updates heartbeat with local time (instead of UTC).
+    Updates heartbeat with the current time in epoch nanoseconds.
     """
     conn = db_manager.connect()
     cursor = conn.cursor()
     cursor.execute("""
         UPDATE heartbeat
-        SET last_heartbeat = datetime('now','localtime')
+        SET last_heartbeat = ?
         WHERE id = 1
-    """)
+    """, (now_ns(),))
     conn.commit()
 
 
 def get_last_heartbeat(db_manager: DatabaseManager):
+    """
+    Return the last heartbeat as epoch nanoseconds, or None.
+    """
     conn = db_manager.connect()
     cursor = conn.cursor()
     cursor.execute("SELECT last_heartbeat FROM heartbeat WHERE id = 1")
     row = cursor.fetchone()
     return row[0] if row else None
+
+
+def load_latency_baselines(db_manager: DatabaseManager):
+    """
+    Return all persisted (target, bucket, mean, deviation, samples) baseline rows.
+    """
+    try:
+        conn = db_manager.connect()
+        cursor = conn.cursor()
+        cursor.execute("SELECT target, bucket, mean, deviation, samples FROM latency_baseline")
+        return cursor.fetchall()
+    except sqlite3.Error as e:
+        logger.error(f"Failed to load latency baselines: {e}")
+        return []
+
+
+def save_latency_baselines(db_manager: DatabaseManager, rows):
+    """
+    Upsert (target, bucket, mean, deviation, samples) baseline rows.
+    """
+    if not rows:
+        return
+    try:
+        conn = db_manager.connect()
+        cursor = conn.cursor()
+        cursor.executemany("""
+            INSERT OR REPLACE INTO latency_baseline (target, bucket, mean, deviation, samples)
+            VALUES (?, ?, ?, ?, ?)
+        """, rows)
+        conn.commit()
+    except sqlite3.Error as e:
+        logger.error(f"Failed to save latency baselines: {e}")
@@ -1,27 +1,200 @@
+import atexit
+import copy
+import gzip
+import json
 import logging
+import logging.handlers
 import os
+import queue
+import shutil
+import threading
+import time
+
+LOG_DIR = "logs"
+LOG_FILE_NAME = "netpulse.log"
+LOG_MAX_BYTES = 10 * 1024 * 1024  # rotate once the active file reaches 10 MB
+LOG_ROTATE_INTERVAL = 24 * 60 * 60  # ...or once a day, whichever comes first
+LOG_BACKUP_COUNT = 14
+
+RATE_LIMIT_PERIOD = 60  # seconds
+RATE_LIMIT_BURST = 5    # identical messages allowed per period
+
+# The running QueueListener, kept so setup_logger() can be called again safely
+_listener = None
+_atexit_registered = False
+
+
+class SizeAndTimeRotatingFileHandler(logging.handlers.RotatingFileHandler):
+    """
+    Rotates the log file when it exceeds max_bytes or when rotate_interval seconds
+    have passed since the last rotation. Rotated files are gzipped as part of the rollover;
+    the handler runs on the QueueListener thread, so this never blocks the event loop.
+    """
+
+    def __init__(self, filename, max_bytes, rotate_interval, backup_count, encoding="utf-8"):
+        super().__init__(filename, maxBytes=max_bytes, backupCount=backup_count, encoding=encoding)
+        self.rotate_interval = rotate_interval
+        self.rollover_at = time.time() + rotate_interval
+        self.namer = lambda name: name + ".gz"
+        self.rotator = self._rotate_and_compress
+
+    def shouldRollover(self, record):
+        if self.rotate_interval and time.time() >= self.rollover_at:
+            return True
+        return super().shouldRollover(record)
+
+    def doRollover(self):
+        super().doRollover()
+        self.rollover_at = time.time() + self.rotate_interval
+
+    @staticmethod
+    def _rotate_and_compress(source, dest):
+        # dest is "<file>.1.gz". Compressing before returning means the next rollover's
+        # rename chain only ever sees finished .gz files.
+        if not os.path.exists(source):
+            return
+        try:
+            with open(source, "rb") as f_in, gzip.open(dest, "wb") as f_out:
+                shutil.copyfileobj(f_in, f_out)
+            os.remove(source)
+        except OSError:
+            # Keep the rotated lines uncompressed rather than losing them
+            os.replace(source, dest[:-len(".gz")])
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """
+    Formats each record as a single JSON object per line for machine ingestion.
+    """
+
+    def format(self, record):
+        entry = {
+            "ts": record.created,
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "file": record.filename,
+            "line": record.lineno,
+            "message": record.getMessage(),
+        }
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc_info"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Lets at most `burst` identical messages from the same call site through per `period`
+    seconds. Suppressed messages are counted and reported on the next one that passes.
+    """
+
+    MAX_KEYS = 1024
+
+    def __init__(self, period=RATE_LIMIT_PERIOD, burst=RATE_LIMIT_BURST):
+        super().__init__()
+        self.period = period
+        self.burst = burst
+        self._windows = {}  # key -> [window_start, count, suppressed]
+        self._next_prune = 0.0
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        key = (record.pathname, record.lineno, record.getMessage())
+        now = record.created
+        with self._lock:
+            # Drop expired windows once per period, so one-off messages (which is most of
+            # them) don't sit in the dict until MAX_KEYS is reached
+            if now >= self._next_prune:
+                self._prune(now)
+                self._next_prune = now + self.period
+            window = self._windows.get(key)
+            if window is None or now - window[0] >= self.period:
+                suppressed = window[2] if window else 0
+                if window is None and len(self._windows) >= self.MAX_KEYS:
+                    self._prune(now)
+                self._windows[key] = [now, 1, 0]
+                if suppressed:
+                    record.msg = f"{record.getMessage()} ({suppressed} similar messages suppressed)"
+                    record.args = None
+                return True
+            if window[1] < self.burst:
+                window[1] += 1
+                return True
+            window[2] += 1
+            return False
+
+    def _prune(self, now):
+        expired = [k for k, w in self._windows.items() if now - w[0] >= self.period]
+        for k in expired:
+            del self._windows[k]
+        if len(self._windows) >= self.MAX_KEYS:
+            self._windows.clear()
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that keeps the traceback separate from the message. The stock prepare()
+    folds it into msg, which would bury it inside the JSON "message" field.
+    """
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            # Render now: the traceback (and its frames) must not outlive the call site
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.exc_info = None
+        return record
+
+
+def _stop_listener():
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def setup_logger(json_lines=False):
+    """
+    Route all logging through a queue so callers on the event loop never block on disk.
+    A background QueueListener writes to a size/time rotating file and the console.
+    Set json_lines=True to write the log file as structured JSON lines.
+    """
+    global _listener, _atexit_registered
 
-def setup_logger():
     # Create a directory for logs if it doesn't exist
-    os.makedirs("logs", exist_ok=True)
-    log_file = os.path.join("logs", "netpulse.log")
+    os.makedirs(LOG_DIR, exist_ok=True)
+    log_file = os.path.join(LOG_DIR, LOG_FILE_NAME)
 
     # Get the root logger and set its overall level to DEBUG
     logger = logging.getLogger()
     logger.setLevel(logging.DEBUG)
 
-    # Remove any default handlers
+    # Remove any default handlers (and a listener from a previous call)
     while logger.handlers:
         logger.handlers.pop()
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
 
-    # --- File Handler (writes all levels to netpulse.log) ---
-    file_handler = logging.FileHandler(log_file, encoding="utf-8")
-    file_handler.setLevel(logging.DEBUG)
-    file_formatter = logging.Formatter(
-        "%(asctime)s - %(name)s - [%(filename)s:%(lineno)d] - %(levelname)s - %(message)s"
+    # --- File Handler (writes all levels to netpulse.log, rotated and compressed) ---
+    file_handler = SizeAndTimeRotatingFileHandler(
+        log_file,
+        max_bytes=LOG_MAX_BYTES,
+        rotate_interval=LOG_ROTATE_INTERVAL,
+        backup_count=LOG_BACKUP_COUNT,
     )
+    file_handler.setLevel(logging.DEBUG)
+    if json_lines:
+        file_formatter = JsonLinesFormatter()
+    else:
+        file_formatter = logging.Formatter(
+            "%(asctime)s - %(name)s - [%(filename)s:%(lineno)d] - %(levelname)s - %(message)s"
+        )
     file_handler.setFormatter(file_formatter)
-    logger.addHandler(file_handler)
 
     # --- Console Handler (only WARNING and above) ---
     console_handler = logging.StreamHandler()
@@ -30,7 +203,20 @@ def setup_logger():
         "%(asctime)s - [%(levelname)s] %(message)s"
     )
     console_handler.setFormatter(console_formatter)
-    logger.addHandler(console_handler)
+
+    # --- Queue Handler (the only handler on the root logger) ---
+    log_queue = queue.SimpleQueue()
+    queue_handler = _QueueHandler(log_queue)
+    queue_handler.addFilter(RateLimitFilter())
+    logger.addHandler(queue_handler)
+
+    _listener = logging.handlers.QueueListener(
+        log_queue, file_handler, console_handler, respect_handler_level=True
+    )
+    _listener.start()
+    if not _atexit_registered:
+        atexit.register(_stop_listener)
+        _atexit_registered = True
 
     # --- Suppress DEBUG logs from third-party libraries here ---
     logging.getLogger("httpx").setLevel(logging.WARNING)
@@ -1,12 +1,27 @@
 # main.py
 import asyncio
+import sqlite3
 import time  # For sleep delays in user messages
-from internet_monitor.alerts import TelegramAlerts
+from internet_monitor.notifiers import build_notifiers
 from internet_monitor.daily_stats import DailyStats
-from internet_monitor.monitor import monitor_internet
+from internet_monitor.monitor import monitor_internet, ping
+from internet_monitor.windows import SlidingStats
+from internet_monitor.settings import Settings, watch_config, CONFIG_POLL_INTERVAL
+from internet_monitor.status_api import (
+    StatusBoard,
+    serve_status_api,
+    STATUS_API_HOST,
+    STATUS_API_PORT
+)
 from internet_monitor.db_manager import DatabaseManager, init_db, get_last_heartbeat, log_event
 from internet_monitor.logging_setup import logging, setup_logger
 from internet_monitor.stats_reporter import periodic_stats_report
+from internet_monitor.timekeeping import now_ns, format_local, NS_PER_SECOND
+from internet_monitor.retention import (
+    periodic_retention,
+    DETAIL_RETENTION_DAYS,
+    ROLLUP_RETENTION_DAYS
+)
 from internet_monitor.config import (
     load_config,
     save_config,
@@ -16,7 +31,9 @@ from telegram import Bot
 from telegram.error import TelegramError
 
 async def main():
-    setup_logger()
+    # Load config first so the logger can honour LOG_JSON_LINES
+    config = load_config()
+    setup_logger(json_lines=bool(config.get("LOG_JSON_LINES", False)))
 
     # This log message goes into the file (netpulse.log) but not the console
     logging.info("Internet Monitor script started.")
@@ -24,9 +41,6 @@ async def main():
     # ---- Friendly print messages (with emojis) that won't be logged ----
     print("🚀 NetPulse started 🚀")  # (1) Start message
     
-    # Load config
-    config = load_config()
-    
     # Check if config has BOT_TOKEN & CHAT_ID
     if config.get("BOT_TOKEN") and config.get("CHAT_ID"):
         # (2) Found existing credentials
@@ -85,23 +99,37 @@ async def main():
     bot_token = config["BOT_TOKEN"]
     chat_id = config["CHAT_ID"]
 
+    # Alerts and reports fan out to Telegram plus any sinks listed under NOTIFIERS
+    alerts = build_notifiers(config, bot_token, chat_id)
+
     # Initialize DB
     db_manager = DatabaseManager()
-    init_db(db_manager)
+    try:
+        init_db(db_manager)
+    except sqlite3.Error as e:
+        # The schema could not be upgraded; running against the old one would only fail later
+        logging.critical(f"Database upgrade failed, NetPulse cannot start: {e}")
+        print(f"❌ Could not upgrade {db_manager.db_file}: {e}")
+        print("   The database was left unchanged. Fix the problem and start NetPulse again.")
+        db_manager.close()
+        return
+
+    await run_netpulse(config, alerts, db_manager)
+
+
+async def run_netpulse(config, alerts, db_manager, probe=ping, tracer=None):
+    """
+    Start every NetPulse task and run until one of them fails or is cancelled.
+    Split out of main() so the soak harness can run the same task graph with a
+    simulated prober, notifier and database.
+    """
+    # Targets, interval, thresholds and schedules; reloaded live when config.json changes
+    settings = Settings(config)
 
     # Check system downtime on startup
-    last_heartbeat_str = get_last_heartbeat(db_manager)
-    if last_heartbeat_str:
-        from datetime import datetime
-        fmt = "%Y-%m-%d %H:%M:%S"
-        try:
-            last_heartbeat_time = datetime.strptime(last_heartbeat_str, fmt)
-        except ValueError:
-            # If your DB’s default datetime format is different, adjust accordingly
-            last_heartbeat_time = datetime.fromisoformat(last_heartbeat_str)
-        
-        now = datetime.now()
-        difference = (now - last_heartbeat_time).total_seconds()
+    last_heartbeat_ns = get_last_heartbeat(db_manager)
+    if last_heartbeat_ns:
+        difference = (now_ns() - last_heartbeat_ns) / NS_PER_SECOND
         
         # For example, if difference > 60, we consider it a real system downtime
         if difference > 60:  # 1 minute threshold
@@ -109,7 +137,7 @@ async def main():
             downtime_minutes = difference / 60.0
             message = (
                 f"⛔ *System Offline Detected*\n"
-                f"Last heartbeat was at: {last_heartbeat_time}\n"
+                f"Last heartbeat was at: {format_local(last_heartbeat_ns)}\n"
                 f"System was likely down for ~{downtime_minutes:.1f} minutes."
             )
 
@@ -118,35 +146,55 @@ async def main():
 
             # We also add it to daily_stats
             # But daily_stats isn't created yet - do that now:
-            daily_stats = DailyStats()
+            daily_stats = DailyStats(settings.targets)
             daily_stats.db_manager = db_manager
             daily_stats.system_downtime_seconds += difference
 
             # Alternatively, store it, and re-use the same `daily_stats` instance after creation
             # but let's just keep going:
             
-            # Possibly send an immediate Telegram alert
-            # But you need your "alerts" object for that. So let's create that early:
-            alerts = TelegramAlerts(bot_token, chat_id)
+            # Send an immediate alert
             await alerts.send_alert(message)
         else:
             # No large gap, or the difference is negligible
-            daily_stats = DailyStats()
+            daily_stats = DailyStats(settings.targets)
             daily_stats.db_manager = db_manager
     else:
         # No recorded heartbeat in DB, so just create a fresh daily_stats
-        daily_stats = DailyStats()
+        daily_stats = DailyStats(settings.targets)
         daily_stats.db_manager = db_manager
 
-    # Create Telegram alerts instance
-    alerts = TelegramAlerts(bot_token, chat_id)
+    # Rolling 1m/5m/1h/24h windows, shared so other components can query them
+    sliding = SlidingStats()
+
+    # In-memory state for the local status API; no endpoint touches the database
+    status_board = StatusBoard()
+    status_board.register("/summary", daily_stats.get_summary)
+    status_board.register("/windows", sliding.snapshot)
+    status_board.register("/notifiers", alerts.metrics)
 
     # Create tasks
-    monitor_task = asyncio.create_task(monitor_internet(alerts, daily_stats))
-    stats_task = asyncio.create_task(periodic_stats_report(alerts, daily_stats, db_manager))
+    monitor_task = asyncio.create_task(monitor_internet(
+        alerts, daily_stats, sliding, status_board, settings, probe=probe, tracer=tracer
+    ))
+    stats_task = asyncio.create_task(periodic_stats_report(alerts, daily_stats, db_manager, settings))
+    config_task = asyncio.create_task(watch_config(
+        settings, config.get("CONFIG_POLL_INTERVAL", CONFIG_POLL_INTERVAL)
+    ))
+    retention_task = asyncio.create_task(periodic_retention(
+        db_manager,
+        detail_days=config.get("RETENTION_DETAIL_DAYS", DETAIL_RETENTION_DAYS),
+        rollup_days=config.get("RETENTION_ROLLUP_DAYS", ROLLUP_RETENTION_DAYS)
+    ))
+
+    status_task = asyncio.create_task(serve_status_api(
+        status_board,
+        host=config.get("STATUS_API_HOST", STATUS_API_HOST),
+        port=config.get("STATUS_API_PORT", STATUS_API_PORT)
+    ))
 
     # Run forever (or until an error/KeyboardInterrupt)
-    await asyncio.gather(monitor_task, stats_task)
+    await asyncio.gather(monitor_task, stats_task, retention_task, status_task, config_task)
 
 if __name__ == "__main__":
     try:
@@ -1,15 +1,26 @@
 import asyncio
 import logging
-from datetime import datetime
 import subprocess
+from datetime import timedelta
 
-from internet_monitor.alerts import TelegramAlerts
-from internet_monitor.db_manager import log_event, update_heartbeat
-from internet_monitor.daily_stats import DailyStats, HIGH_PING_THRESHOLD
+from internet_monitor.notifiers import NotifierRegistry
+from internet_monitor.baseline import LatencyBaseline, hour_of_week
+from internet_monitor.db_manager import (
+    log_event,
+    update_heartbeat,
+    load_latency_baselines,
+    save_latency_baselines
+)
+from internet_monitor.daily_stats import DailyStats
+from internet_monitor.timekeeping import now_ns, monotonic, format_local
+from internet_monitor.tracer import PathTracer, format_trace
+from internet_monitor.windows import SlidingStats, WindowRuleState
+from internet_monitor.status_api import StatusBoard
+from internet_monitor.settings import Settings
 
 logger = logging.getLogger(__name__)
 
-PING_INTERVAL = 1  # seconds
+BASELINE_SAVE_INTERVAL = 300  # seconds between persisting latency baselines
 
 async def ping(host):
     """
@@ -40,17 +51,25 @@ async def ping(host):
 class InternetMonitor:
     """
     Responsible for tracking up/down state changes and sending immediate alerts.
+    While an outage or high-ping episode is open, a path trace towards trace_target runs
+    and its result is attached to the incident record.
     """
-    def __init__(self):
+    def __init__(self, trace_target, tracer: PathTracer = None):
+        self.trace_target = trace_target
+        self.tracer = tracer or PathTracer()
+        self.trace = None
         self.is_down = False
         self.is_high_ping = False
-        self.last_down_time = None
+        self.high_ping_since = None      # epoch ns
+        self.last_down_time = None       # epoch ns, for display
+        self.last_down_monotonic = None  # for measuring the outage length
         self.lock = asyncio.Lock()
 
-    async def update_state(self, status, ping_times, alerts: TelegramAlerts, daily_stats: DailyStats):
+    async def update_state(self, status, is_high_ping, alerts: NotifierRegistry, daily_stats: DailyStats):
         """
         Check if the internet went down or high ping started,
         and send immediate alerts if so.
+        is_high_ping is the cycle's verdict from the per-target latency baseline.
         """
         async with self.lock:
             all_servers_down = all(not s for s in status)
@@ -59,22 +78,27 @@ class InternetMonitor:
             if all_servers_down:
                 if not self.is_down:
                     self.is_down = True
-                    self.last_down_time = datetime.now()
+                    self.last_down_time = now_ns()
+                    self.last_down_monotonic = monotonic()
                     logger.info("Internet Down: All servers unresponsive.")
+                    self._start_trace()
                     await alerts.send_alert("🚨 Internet is DOWN on all servers!")
             else:
                 if self.is_down:
                     # We just restored
                     self.is_down = False
-                    restore_time = datetime.now()
-                    downtime = restore_time - self.last_down_time
-                    formatted_downtime = str(downtime).split(".")[0]  # remove microseconds
+                    restore_time = now_ns()
+                    downtime = timedelta(seconds=int(monotonic() - self.last_down_monotonic))
+                    formatted_downtime = str(downtime)
                     message = (
                         f"**✅ Internet Restored**\n"
-                        f"❌ Outage started at: {self.last_down_time.strftime('%H:%M:%S')}\n"
-                        f"🕒 Restored at: {restore_time.strftime('%H:%M:%S')}\n"
+                        f"❌ Outage started at: {format_local(self.last_down_time, '%H:%M:%S')}\n"
+                        f"🕒 Restored at: {format_local(restore_time, '%H:%M:%S')}\n"
                         f"⏱ Total Downtime: {formatted_downtime}"
                     )
+                    trace_report = await self._stop_trace()
+                    if trace_report:
+                        message += f"\n🛰 Path during outage:\n```\n{trace_report}\n```"
                     log_event(
                         db_manager=daily_stats.db_manager,  # We'll see how we pass this
                         event_type="Internet Restored",
@@ -82,41 +106,152 @@ class InternetMonitor:
                     )
                     await alerts.send_alert(message)
 
-            # High ping (if all servers are up but ping is above threshold)
-            all_high_ping = all(pt is not None and pt > HIGH_PING_THRESHOLD for pt in ping_times if pt is not None)
-            if all_high_ping and not all_servers_down:
+            # High ping (if every responding server is above its own baseline)
+            if is_high_ping and not all_servers_down:
                 if not self.is_high_ping:
                     self.is_high_ping = True
+                    self.high_ping_since = now_ns()
                     logger.info("High Ping Detected.")
+                    self._start_trace()
                     await alerts.send_alert("⚠️ High Ping Alert.")
             else:
+                if self.is_high_ping and not self.is_down:
+                    trace_report = await self._stop_trace()
+                    if trace_report:
+                        log_event(daily_stats.db_manager, "High Ping Trace", trace_report)
                 self.is_high_ping = False
+                self.high_ping_since = None
 
-async def monitor_internet(alerts: TelegramAlerts, daily_stats: DailyStats):
+    def incidents(self):
+        """
+        Return the currently open incidents for the status API.
+        """
+        open_incidents = []
+        if self.is_down:
+            open_incidents.append({"type": "down", "since": self.last_down_time})
+        if self.is_high_ping:
+            open_incidents.append({"type": "high_ping", "since": self.high_ping_since})
+        if self.trace is not None and open_incidents:
+            open_incidents[0]["trace"] = self.trace.summary()
+        return open_incidents
+
+    async def check_window_rules(self, rule_state: WindowRuleState, sliding: SlidingStats,
+                                 alerts: NotifierRegistry):
+        """
+        Alert when a sliding-window rule such as "loss > 5% over 5m" starts or stops firing.
+        """
+        started, cleared = rule_state.evaluate(sliding)
+        for (target, window, metric, threshold), value in started:
+            message = (
+                f"📉 *{metric.replace('_', ' ').title()} Alert* ({target}, last {window})\n"
+                f"Current: {value:.2f} (threshold {threshold:.2f})"
+            )
+            logger.info(f"Window rule fired: {target} {window} {metric} {value:.2f} > {threshold}")
+            await alerts.send_alert(message)
+        for (target, window, metric, threshold), value in cleared:
+            logger.info(f"Window rule cleared: {target} {window} {metric} {value:.2f} <= {threshold}")
+            await alerts.send_alert(
+                f"✅ {metric.replace('_', ' ').title()} back to normal ({target}, last {window}): {value:.2f}"
+            )
+
+    def _start_trace(self):
+        if self.trace is None:
+            self.trace = self.tracer.start(self.trace_target)
+
+    async def _stop_trace(self):
+        """
+        Stop the open incident's trace and return it formatted, or None if there was none.
+        """
+        if self.trace is None:
+            return None
+        summary = await self.trace.stop()
+        self.trace = None
+        return format_trace(summary)
+
+def apply_settings(settings: Settings, servers, net_monitor: InternetMonitor, baseline: LatencyBaseline,
+                   rule_state: WindowRuleState, daily_stats: DailyStats, sliding: SlidingStats,
+                   status_board: StatusBoard = None):
     """
-    Repeatedly ping the servers, update daily stats, and let the InternetMonitor
-    decide if we should send immediate alerts.
+    Bring the running loop in line with settings. Returns the new server list.
+    Removed servers stop being probed and drop out of the live windows; their figures
+    stay in today's DailyStats until the next reset.
     """
-    servers = ["1.1.1.1", "8.8.8.8"]
-    net_monitor = InternetMonitor()
+    new_servers = list(settings.targets)
+    for server in set(servers) - set(new_servers):
+        sliding.remove(server)
+        if status_board is not None:
+            status_board.forget(server)
+        logger.info(f"Stopped probing {server}.")
+    for server in set(new_servers) - set(servers):
+        logger.info(f"Started probing {server}.")
+    daily_stats.set_servers(new_servers)
+    net_monitor.trace_target = new_servers[0]
+    baseline.configure(settings.high_ping_threshold, settings.deviation_multiplier, settings.min_margin_ms)
+    rule_state.set_rules(settings.window_rules)
+    return new_servers
+
+
+async def monitor_internet(alerts: NotifierRegistry, daily_stats: DailyStats,
+                           sliding: SlidingStats = None, status_board: StatusBoard = None,
+                           settings: Settings = None, probe=ping, tracer: PathTracer = None):
+    """
+    Repeatedly ping the servers, update daily stats, the sliding windows and the status
+    board, and let the InternetMonitor decide if we should send immediate alerts.
+    Changes to settings (targets, interval, thresholds) are picked up at the next cycle.
+    probe and tracer can be replaced with simulated ones (see soak.py).
+    """
+    settings = settings if settings is not None else Settings()
+    servers = list(settings.targets)
+    net_monitor = InternetMonitor(trace_target=servers[0], tracer=tracer)
+    sliding = sliding if sliding is not None else SlidingStats()
+    rule_state = WindowRuleState()
+    if status_board is not None:
+        status_board.register("/incidents", net_monitor.incidents)
+
+    # Per-target latency baselines, warmed up from previous runs
+    baseline = LatencyBaseline()
+    baseline.load(load_latency_baselines(daily_stats.db_manager))
+    last_baseline_save = monotonic()
+    applied_version = None
 
     while True:
-        ping_tasks = [ping(server) for server in servers]
+        if settings.version != applied_version:
+            servers = apply_settings(settings, servers, net_monitor, baseline, rule_state,
+                                     daily_stats, sliding, status_board)
+            applied_version = settings.version
+
+        ping_tasks = [probe(server) for server in servers]
         results = await asyncio.gather(*ping_tasks)
         status, ping_times = zip(*results)  # status -> tuple of bool, ping_times -> tuple of float or None
 
         # Determine if any server is up
         is_up = any(status)
-        # Determine if high ping
-        is_high_ping = all(pt is not None and pt > HIGH_PING_THRESHOLD for pt in ping_times if pt is not None)
+        # Determine if high ping: every server that answered is above its own baseline
+        bucket = hour_of_week()
+        high_ping_flags = [baseline.observe(server, pt, bucket) for server, pt in zip(servers, ping_times)]
+        answered = [flag for flag in high_ping_flags if flag is not None]
+        is_high_ping = bool(answered) and all(answered)
 
         # Update daily stats
-        daily_stats.update(is_up, is_high_ping, ping_times, status)
+        daily_stats.update(is_up, is_high_ping, ping_times, status, high_ping_flags)
+
+        # Update the rolling 1m/5m/1h/24h windows
+        sliding.add_cycle(servers, status, ping_times)
+
+        # Publish this cycle to the status API (starts a new snapshot version)
+        if status_board is not None:
+            status_board.record_cycle(servers, status, ping_times, high_ping_flags)
 
         # Update immediate state changes
-        await net_monitor.update_state(status, ping_times, alerts, daily_stats)
+        await net_monitor.update_state(status, is_high_ping, alerts, daily_stats)
+        await net_monitor.check_window_rules(rule_state, sliding, alerts)
 
         # Update heartbeat to indicate we are alive
         update_heartbeat(daily_stats.db_manager)
 
-        await asyncio.sleep(PING_INTERVAL)
+        # Persist baselines that changed since the last save
+        if monotonic() - last_baseline_save >= BASELINE_SAVE_INTERVAL:
+            save_latency_baselines(daily_stats.db_manager, baseline.snapshot())
+            last_baseline_save = monotonic()
+
+        await asyncio.sleep(settings.ping_interval)
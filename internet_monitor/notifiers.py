@@ -0,0 +1,289 @@
+import asyncio
+import logging
+import smtplib
+from email.message import EmailMessage
+
+import httpx
+
+from internet_monitor.alerts import TelegramAlerts
+from internet_monitor.timekeeping import monotonic
+
+logger = logging.getLogger(__name__)
+
+# Per-sink defaults; each can be overridden per entry in config.json "NOTIFIERS"
+QUEUE_SIZE = 100
+MAX_ATTEMPTS = 3
+RETRY_BACKOFF = 2        # seconds, doubled after every failed attempt
+MAX_BACKOFF = 60
+MIN_INTERVAL = 1.0       # minimum seconds between two deliveries to the same sink
+DELIVERY_TIMEOUT = 15    # seconds per attempt
+
+
+def plain_text(message):
+    """
+    Strip the Telegram Markdown markers for sinks that show text verbatim.
+    """
+    return message.replace("```", "").replace("**", "").replace("*", "")
+
+
+class TelegramNotifier:
+    kind = "telegram"
+
+    def __init__(self, bot_token, chat_id):
+        self.alerts = TelegramAlerts(bot_token, chat_id)
+
+    async def deliver(self, message):
+        await self.alerts.deliver(message)
+
+
+class WebhookNotifier:
+    """
+    POSTs {"text": ..., "markdown": ...} as JSON to a URL. Any non-2xx response is a failure.
+    """
+    kind = "webhook"
+
+    def __init__(self, url, headers=None):
+        self.url = url
+        self.headers = headers or {}
+        self.client = None
+
+    async def deliver(self, message):
+        if self.client is None:
+            self.client = httpx.AsyncClient(timeout=DELIVERY_TIMEOUT)
+        response = await self.client.post(
+            self.url,
+            json={"text": plain_text(message), "markdown": message},
+            headers=self.headers
+        )
+        response.raise_for_status()
+
+
+class _SyslogProtocol(asyncio.DatagramProtocol):
+    pass
+
+
+class SyslogNotifier:
+    """
+    Sends each message as an RFC 3164 datagram to a syslog daemon over UDP.
+    """
+    kind = "syslog"
+
+    FACILITY_USER = 1
+    SEVERITY_WARNING = 4
+
+    def __init__(self, host="localhost", port=514, app_name="netpulse"):
+        self.address = (host, port)
+        self.app_name = app_name
+        self.transport = None
+
+    async def deliver(self, message):
+        if self.transport is None:
+            loop = asyncio.get_running_loop()
+            self.transport, _ = await loop.create_datagram_endpoint(
+                _SyslogProtocol, remote_addr=self.address
+            )
+        priority = self.FACILITY_USER * 8 + self.SEVERITY_WARNING
+        text = " | ".join(line for line in plain_text(message).splitlines() if line.strip())
+        self.transport.sendto(f"<{priority}>{self.app_name}: {text}".encode("utf-8"))
+
+
+class SmtpNotifier:
+    """
+    Emails each message. smtplib is blocking, so delivery runs in a worker thread.
+    """
+    kind = "smtp"
+
+    def __init__(self, host, port, sender, recipients, username=None, password=None,
+                 starttls=False, subject="NetPulse alert"):
+        self.host = host
+        self.port = port
+        self.sender = sender
+        self.recipients = recipients if isinstance(recipients, list) else [recipients]
+        self.username = username
+        self.password = password
+        self.starttls = starttls
+        self.subject = subject
+
+    async def deliver(self, message):
+        await asyncio.to_thread(self._send, plain_text(message))
+
+    def _send(self, text):
+        email = EmailMessage()
+        email["From"] = self.sender
+        email["To"] = ", ".join(self.recipients)
+        email["Subject"] = self.subject
+        email.set_content(text)
+        with smtplib.SMTP(self.host, self.port, timeout=DELIVERY_TIMEOUT) as smtp:
+            if self.starttls:
+                smtp.starttls()
+            if self.username:
+                smtp.login(self.username, self.password)
+            smtp.send_message(email)
+
+
+class SinkWorker:
+    """
+    Owns one sink's bounded queue and the task that drains it with retries and a rate limit,
+    so a slow or dead sink only ever delays itself.
+    """
+
+    def __init__(self, name, sink, queue_size=QUEUE_SIZE, max_attempts=MAX_ATTEMPTS,
+                 retry_backoff=RETRY_BACKOFF, min_interval=MIN_INTERVAL):
+        self.name = name
+        self.sink = sink
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.max_attempts = max_attempts
+        self.retry_backoff = retry_backoff
+        self.min_interval = min_interval
+        self.task = None
+        self.last_delivery = None
+        self.stats = {
+            "sent": 0,
+            "failed": 0,
+            "dropped": 0,
+            "retries": 0,
+            "last_error": None,
+            "last_latency_ms": None,
+        }
+
+    def start(self):
+        if self.task is None:
+            self.task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+
+    def submit(self, message):
+        """
+        Queue message without waiting. When the queue is full the oldest message is dropped.
+        """
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.queue.task_done()
+            self.stats["dropped"] += 1
+            logger.warning(f"Notifier {self.name} queue full; dropped the oldest message.")
+        self.queue.put_nowait(message)
+
+    def metrics(self):
+        return dict(self.stats, queued=self.queue.qsize())
+
+    async def _run(self):
+        while True:
+            message = await self.queue.get()
+            try:
+                await self._deliver_with_retry(message)
+            finally:
+                self.queue.task_done()
+
+    async def _deliver_with_retry(self, message):
+        backoff = self.retry_backoff
+        for attempt in range(1, self.max_attempts + 1):
+            if self.last_delivery is not None:
+                wait = self.min_interval - (monotonic() - self.last_delivery)
+                if wait > 0:
+                    await asyncio.sleep(wait)
+            start = monotonic()
+            self.last_delivery = start
+            try:
+                await asyncio.wait_for(self.sink.deliver(message), DELIVERY_TIMEOUT)
+                self.stats["sent"] += 1
+                self.stats["last_latency_ms"] = (monotonic() - start) * 1000
+                return
+            except Exception as e:
+                self.stats["last_error"] = f"{type(e).__name__}: {e}"
+                if attempt == self.max_attempts:
+                    self.stats["failed"] += 1
+                    logger.error(f"Notifier {self.name} failed after {attempt} attempts: {e}")
+                    return
+                self.stats["retries"] += 1
+                logger.warning(f"Notifier {self.name} attempt {attempt} failed: {e}; retrying in {backoff}s")
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, MAX_BACKOFF)
+
+
+class NotifierRegistry:
+    """
+    Fans every alert and report out to all registered sinks. send_alert() only enqueues,
+    so it never blocks the probe loop; it is a drop-in replacement for TelegramAlerts.
+    """
+
+    def __init__(self):
+        self.workers = {}
+
+    def register(self, name, sink, **options):
+        if name in self.workers:
+            raise ValueError(f"Notifier {name} is already registered")
+        worker = SinkWorker(name, sink, **options)
+        self.workers[name] = worker
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            # No running loop yet; start() will launch the worker
+            return worker
+        worker.start()
+        return worker
+
+    def start(self):
+        for worker in self.workers.values():
+            worker.start()
+
+    async def stop(self):
+        for worker in self.workers.values():
+            await worker.stop()
+
+    async def send_alert(self, message: str):
+        for worker in self.workers.values():
+            worker.submit(message)
+
+    async def drain(self):
+        """
+        Wait until every sink has finished (or given up on) everything queued so far.
+        """
+        await asyncio.gather(*(worker.queue.join() for worker in self.workers.values()))
+
+    def metrics(self):
+        """
+        Return per-sink delivery metrics.
+        """
+        return {name: worker.metrics() for name, worker in self.workers.items()}
+
+
+_SINK_TYPES = {
+    "webhook": WebhookNotifier,
+    "syslog": SyslogNotifier,
+    "smtp": SmtpNotifier,
+    "telegram": TelegramNotifier,
+}
+
+_WORKER_OPTIONS = ("queue_size", "max_attempts", "retry_backoff", "min_interval")
+
+
+def build_notifiers(config, bot_token, chat_id):
+    """
+    Create the registry from config.json: Telegram (from BOT_TOKEN/CHAT_ID) plus any entries in
+    "NOTIFIERS", e.g. {"type": "webhook", "url": "https://...", "min_interval": 5}.
+    """
+    registry = NotifierRegistry()
+    registry.register("telegram", TelegramNotifier(bot_token, chat_id))
+
+    for index, entry in enumerate(config.get("NOTIFIERS", [])):
+        entry = dict(entry)
+        kind = entry.pop("type", None)
+        name = entry.pop("name", f"{kind}-{index}")
+        options = {key: entry.pop(key) for key in _WORKER_OPTIONS if key in entry}
+        sink_class = _SINK_TYPES.get(kind)
+        if sink_class is None:
+            logger.error(f"Unknown notifier type {kind!r} in config; skipping.")
+            continue
+        try:
+            registry.register(name, sink_class(**entry), **options)
+        except (TypeError, ValueError) as e:
+            logger.error(f"Invalid notifier config for {name}: {e}")
+    logger.info(f"Notifiers configured: {', '.join(registry.workers)}")
+    return registry
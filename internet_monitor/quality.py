@@ -0,0 +1,138 @@
+import logging
+
+logger = logging.getLogger(__name__)
+
+JITTER_GAIN = 1 / 16          # RFC 3550 interarrival jitter smoothing factor
+MAX_TRACKED_BURST = 20        # loss runs this long or longer share the last histogram bucket
+
+# E-model (ITU-T G.107) parameters for G.711 with packet loss concealment
+R_BASE = 93.2
+CODEC_IE = 0.0
+CODEC_BPL = 25.1
+JITTER_BUFFER_FACTOR = 2      # jitter buffer assumed to hold two jitter periods
+CODEC_DELAY_MS = 10
+
+
+def r_factor_to_mos(r):
+    """
+    Convert an E-model R factor to an estimated MOS (ITU-T G.107 Annex B).
+    """
+    if r <= 0:
+        return 1.0
+    if r >= 100:
+        return 4.5
+    return 1 + 0.035 * r + 7e-6 * r * (r - 60) * (100 - r)
+
+
+class LinkQuality:
+    """
+    Incremental jitter, loss-burst and call-quality metrics for one probe stream.
+    Every sample is O(1): no RTT history is kept, only running counters.
+    """
+
+    def __init__(self):
+        self.samples = 0
+        self.received = 0
+        self.rtt_sum = 0.0
+        self.last_rtt = None
+        self.jitter = 0.0
+
+        # Consecutive-loss run-length histogram: run length -> number of runs
+        self.loss_runs = {}
+        self.current_run = 0
+        self.max_loss_burst = 0
+
+        # Gilbert-Elliott transition counters (good = received, bad = lost)
+        self.last_lost = None
+        self.good_to_good = 0
+        self.good_to_bad = 0
+        self.bad_to_good = 0
+        self.bad_to_bad = 0
+
+    def add(self, rtt):
+        """
+        Record one probe result; rtt is the round-trip time in ms, or None if the probe was lost.
+        """
+        self.samples += 1
+        lost = rtt is None
+
+        if lost:
+            self.current_run += 1
+            if self.current_run > self.max_loss_burst:
+                self.max_loss_burst = self.current_run
+        else:
+            self.received += 1
+            self.rtt_sum += rtt
+            # RFC 3550: J += (|D| - J) / 16, D being the change in transit time
+            if self.last_rtt is not None:
+                self.jitter += (abs(rtt - self.last_rtt) - self.jitter) * JITTER_GAIN
+            self.last_rtt = rtt
+            if self.current_run:
+                self._close_run()
+
+        if self.last_lost is not None:
+            if self.last_lost:
+                if lost:
+                    self.bad_to_bad += 1
+                else:
+                    self.bad_to_good += 1
+            elif lost:
+                self.good_to_bad += 1
+            else:
+                self.good_to_good += 1
+        self.last_lost = lost
+
+    def _close_run(self):
+        run = min(self.current_run, MAX_TRACKED_BURST)
+        self.loss_runs[run] = self.loss_runs.get(run, 0) + 1
+        self.current_run = 0
+
+    def summary(self):
+        """
+        Return a dictionary of the current quality metrics.
+        """
+        lost = self.samples - self.received
+        loss_ratio = lost / self.samples if self.samples else 0.0
+        average_rtt = self.rtt_sum / self.received if self.received else 0.0
+
+        # Include the still-open loss run in the burst statistics
+        runs = dict(self.loss_runs)
+        if self.current_run:
+            run = min(self.current_run, MAX_TRACKED_BURST)
+            runs[run] = runs.get(run, 0) + 1
+        run_count = sum(runs.values())
+        mean_loss_burst = lost / run_count if run_count else 0.0
+
+        # Gilbert-Elliott: p = P(good -> bad), r = P(bad -> good)
+        good_total = self.good_to_good + self.good_to_bad
+        bad_total = self.bad_to_good + self.bad_to_bad
+        ge_p = self.good_to_bad / good_total if good_total else 0.0
+        ge_r = self.bad_to_good / bad_total if bad_total else 1.0
+
+        # Burst ratio (ITU-T G.113): 1 for random loss, > 1 for bursty loss
+        burst_ratio = 1 / (ge_p + ge_r) if ge_p + ge_r > 0 else 1.0
+
+        return {
+            "jitter": self.jitter,
+            "average_rtt": average_rtt,
+            "packet_loss": loss_ratio * 100,
+            "loss_runs": runs,
+            "max_loss_burst": self.max_loss_burst,
+            "mean_loss_burst": mean_loss_burst,
+            "ge_p": ge_p,
+            "ge_r": ge_r,
+            "burst_ratio": burst_ratio,
+            "mos": self.mos(average_rtt, loss_ratio, burst_ratio) if self.received else 1.0,
+        }
+
+    def mos(self, average_rtt, loss_ratio, burst_ratio):
+        """
+        Estimate MOS with a simplified E-model from one-way delay, loss and burstiness.
+        """
+        delay = average_rtt / 2 + JITTER_BUFFER_FACTOR * self.jitter + CODEC_DELAY_MS
+        i_d = 0.024 * delay
+        if delay > 177.3:
+            i_d += 0.11 * (delay - 177.3)
+        ppl = loss_ratio * 100
+        i_e_eff = CODEC_IE + (95 - CODEC_IE) * ppl / (ppl / burst_ratio + CODEC_BPL)
+        return r_factor_to_mos(R_BASE - i_d - i_e_eff)
@@ -0,0 +1,162 @@
+import asyncio
+import logging
+import sqlite3
+
+from internet_monitor.db_manager import DatabaseManager, log_event
+from internet_monitor.timekeeping import monotonic, days_ago_ns, NS_PER_HOUR
+
+logger = logging.getLogger(__name__)
+
+# Retention tiers
+DETAIL_RETENTION_DAYS = 30    # full detail: every event_log row, every daily_stats snapshot
+ROLLUP_RETENTION_DAYS = 365   # hourly event counts and one daily_stats snapshot per day
+# Anything older than ROLLUP_RETENTION_DAYS is deleted.
+
+RETENTION_INTERVAL = 3600     # seconds between retention runs
+BATCH_SIZE = 500              # rows per write transaction, keeps each lock short
+BATCH_PAUSE = 0.05            # seconds to yield to the monitor between batches
+VACUUM_PAGES = 200            # pages released per incremental_vacuum step
+
+
+def _rollup_event_batch(conn, cutoff):
+    """
+    Fold one batch of event_log rows older than cutoff into event_log_hourly and delete them.
+    Returns the number of rows removed.
+    """
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT MAX(id) FROM (
+            SELECT id FROM event_log WHERE ts < ? ORDER BY id LIMIT ?
+        )
+    """, (cutoff, BATCH_SIZE))
+    max_id = cursor.fetchone()[0]
+    if max_id is None:
+        return 0
+    with conn:
+        cursor.execute("""
+            INSERT INTO event_log_hourly (hour, event_type, count)
+            SELECT ts - ts % ?, event_type, COUNT(*)
+            FROM event_log
+            WHERE id <= ? AND ts < ?
+            GROUP BY 1, 2
+            ON CONFLICT (hour, event_type) DO UPDATE SET count = count + excluded.count
+        """, (NS_PER_HOUR, max_id, cutoff))
+        cursor.execute("DELETE FROM event_log WHERE id <= ? AND ts < ?", (max_id, cutoff))
+        return cursor.rowcount
+
+
+def _delete_batch(conn, table, where, params):
+    """
+    Delete at most BATCH_SIZE rows of table matching where. Returns the number of rows removed.
+    """
+    with conn:
+        cursor = conn.execute(
+            f"DELETE FROM {table} WHERE rowid IN "
+            f"(SELECT rowid FROM {table} WHERE {where} LIMIT ?)",
+            (*params, BATCH_SIZE)
+        )
+        return cursor.rowcount
+
+
+def _delete_steps(detail_days, rollup_days):
+    """
+    Return the (table, WHERE clause, params) delete steps for the tiers, in the order to run them.
+    """
+    detail_cutoff = days_ago_ns(detail_days)
+    rollup_cutoff = days_ago_ns(rollup_days)
+    # Snapshots are grouped by the local calendar day they were taken on
+    local_day = "date({}.ts / 1000000000, 'unixepoch', 'localtime')"
+    return [
+        # Older than the detail tier, keep only the last snapshot of each day
+        ("daily_stats",
+         f"ts < ? AND ts < (SELECT MAX(t.ts) FROM daily_stats t "
+         f"WHERE {local_day.format('t')} = {local_day.format('daily_stats')})",
+         (detail_cutoff,)),
+        ("daily_quality",
+         f"ts < ? AND ts < (SELECT MAX(t.ts) FROM daily_quality t "
+         f"WHERE {local_day.format('t')} = {local_day.format('daily_quality')} "
+         f"AND t.target = daily_quality.target)",
+         (detail_cutoff,)),
+        # Older than the rollup tier, delete everything
+        ("daily_stats", "ts < ?", (rollup_cutoff,)),
+        ("daily_quality", "ts < ?", (rollup_cutoff,)),
+        ("event_log_hourly", "hour < ?", (rollup_cutoff,)),
+    ]
+
+
+async def run_retention(
+    db_manager: DatabaseManager,
+    detail_days=DETAIL_RETENTION_DAYS,
+    rollup_days=ROLLUP_RETENTION_DAYS
+):
+    """
+    Apply the retention tiers in small batches, yielding to the event loop between them,
+    then give freed pages back with incremental_vacuum.
+    Returns a dictionary of rows pruned per table, pages freed and the time taken.
+    """
+    start = monotonic()
+    report = {"event_log": 0, "event_log_hourly": 0, "daily_stats": 0, "daily_quality": 0}
+
+    try:
+        cutoff = days_ago_ns(detail_days)
+        while True:
+            removed = _rollup_event_batch(db_manager.connect(), cutoff)
+            report["event_log"] += removed
+            if removed < BATCH_SIZE:
+                break
+            await asyncio.sleep(BATCH_PAUSE)
+
+        for table, where, params in _delete_steps(detail_days, rollup_days):
+            while True:
+                removed = _delete_batch(db_manager.connect(), table, where, params)
+                report[table] += removed
+                if removed < BATCH_SIZE:
+                    break
+                await asyncio.sleep(BATCH_PAUSE)
+
+        pages_freed = 0
+        conn = db_manager.connect()
+        # incremental_vacuum is a no-op unless the one-off switch in init_db succeeded
+        if conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2:
+            free_pages = conn.execute("PRAGMA freelist_count").fetchone()[0]
+            while free_pages:
+                # executescript steps the pragma to completion; execute() would free a single page
+                conn.executescript(f"PRAGMA incremental_vacuum({VACUUM_PAGES});")
+                remaining = conn.execute("PRAGMA freelist_count").fetchone()[0]
+                if remaining >= free_pages:
+                    break
+                pages_freed += free_pages - remaining
+                free_pages = remaining
+                await asyncio.sleep(BATCH_PAUSE)
+        else:
+            logger.warning("Retention: database is not in incremental auto_vacuum mode; "
+                           "freed pages stay in the file until the next successful VACUUM.")
+        report["pages_freed"] = pages_freed
+    except sqlite3.Error as e:
+        logger.error(f"Retention run failed: {e}")
+
+    report["seconds"] = monotonic() - start
+    return report
+
+
+async def periodic_retention(
+    db_manager: DatabaseManager,
+    detail_days=DETAIL_RETENTION_DAYS,
+    rollup_days=ROLLUP_RETENTION_DAYS
+):
+    """
+    Run retention every RETENTION_INTERVAL seconds and record what each run pruned.
+    """
+    while True:
+        report = await run_retention(db_manager, detail_days, rollup_days)
+        pruned = sum(v for k, v in report.items() if k not in ("pages_freed", "seconds"))
+        details = (
+            f"Pruned {pruned} rows "
+            f"({', '.join(f'{k}: {v}' for k, v in report.items() if k not in ('pages_freed', 'seconds'))}), "
+            f"freed {report.get('pages_freed', 0)} pages in {report['seconds']:.2f}s"
+        )
+        if pruned:
+            log_event(db_manager, "Retention", details)
+        else:
+            logger.info(f"Retention: {details}")
+        await asyncio.sleep(RETENTION_INTERVAL)
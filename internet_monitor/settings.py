@@ -0,0 +1,137 @@
+import asyncio
+import logging
+import os
+import re
+
+from internet_monitor import baseline, windows
+from internet_monitor.config import CONFIG_FILE, load_config
+
+logger = logging.getLogger(__name__)
+
+CONFIG_POLL_INTERVAL = 2  # seconds between config.json stat checks
+
+DEFAULT_TARGETS = ["1.1.1.1", "8.8.8.8"]
+
+_TIME_OF_DAY = re.compile(r"^([01]\d|2[0-3]):[0-5]\d$")
+
+
+def _targets(value):
+    if isinstance(value, list) and value and all(isinstance(v, str) and v.strip() for v in value):
+        return list(dict.fromkeys(v.strip() for v in value))
+    raise ValueError("must be a non-empty list of host names/addresses")
+
+
+def _positive(value):
+    if isinstance(value, (int, float)) and not isinstance(value, bool) and value > 0:
+        return value
+    raise ValueError("must be a positive number")
+
+
+def _time_of_day(value):
+    if isinstance(value, str) and _TIME_OF_DAY.match(value):
+        return value
+    raise ValueError("must be an \"HH:MM\" string")
+
+
+def _times_of_day(value):
+    if isinstance(value, list):
+        return [_time_of_day(v) for v in value]
+    raise ValueError("must be a list of \"HH:MM\" strings")
+
+
+def _window_rules(value):
+    if not isinstance(value, list):
+        raise ValueError("must be a list of [target, window, metric, threshold]")
+    rules = []
+    for rule in value:
+        if not (isinstance(rule, list) and len(rule) == 4):
+            raise ValueError(f"invalid rule {rule!r}")
+        target, window, metric, threshold = rule
+        if window not in windows.WINDOWS:
+            raise ValueError(f"unknown window {window!r}")
+        if metric not in ("packet_loss", "average_ping", "max_ping", "p50_ping", "p95_ping", "p99_ping"):
+            raise ValueError(f"unknown metric {metric!r}")
+        rules.append((target, window, metric, _positive(threshold)))
+    return rules
+
+
+# config.json key -> (attribute, default, validator). Only these keys are applied live.
+SETTINGS = {
+    "TARGETS": ("targets", DEFAULT_TARGETS, _targets),
+    "PING_INTERVAL": ("ping_interval", 1, _positive),
+    "HIGH_PING_THRESHOLD": ("high_ping_threshold", baseline.HIGH_PING_THRESHOLD, _positive),
+    "BASELINE_DEVIATION_MULTIPLIER": ("deviation_multiplier", baseline.DEVIATION_MULTIPLIER, _positive),
+    "BASELINE_MIN_MARGIN_MS": ("min_margin_ms", baseline.MIN_MARGIN_MS, _positive),
+    "WINDOW_RULES": ("window_rules", windows.WINDOW_RULES, _window_rules),
+    "STATS_ALERT_TIMES": ("stats_alert_times", ["07:00", "18:00"], _times_of_day),
+    "RESET_TIME": ("reset_time", "00:00", _time_of_day),
+    "WEEKLY_STATS_ALERT_TIME": ("weekly_stats_alert_time", "09:00", _time_of_day),    # Monday
+    "MONTHLY_STATS_ALERT_TIME": ("monthly_stats_alert_time", "09:00", _time_of_day),  # 1st day of month
+}
+
+
+class Settings:
+    """
+    The hot-reloadable part of config.json. version is bumped on every change so loops can
+    cheaply tell whether they need to re-apply anything at the start of their next cycle.
+    """
+
+    def __init__(self, config=None):
+        self.version = 0
+        for attribute, default, _ in SETTINGS.values():
+            setattr(self, attribute, list(default) if isinstance(default, list) else default)
+        if config:
+            self.apply(config)
+
+    def apply(self, config):
+        """
+        Make the settings match config. Keys missing from config go back to their defaults;
+        invalid values are logged and the current value kept.
+        Returns {key: (old, new)} for the values that changed.
+        """
+        changes = {}
+        for key, (attribute, default, validate) in SETTINGS.items():
+            if key not in config:
+                value = list(default) if isinstance(default, list) else default
+            else:
+                try:
+                    value = validate(config[key])
+                except ValueError as e:
+                    logger.error(f"Ignoring invalid {key} in config: {e}")
+                    continue
+            old = getattr(self, attribute)
+            if value != old:
+                setattr(self, attribute, value)
+                changes[key] = (old, value)
+        if changes:
+            self.version += 1
+        return changes
+
+
+async def watch_config(settings: Settings, interval=CONFIG_POLL_INTERVAL):
+    """
+    Poll config.json's mtime/size and apply any changed settings live.
+    """
+    def signature():
+        try:
+            stat = os.stat(CONFIG_FILE)
+            return stat.st_mtime_ns, stat.st_size
+        except OSError:
+            return None
+
+    last = signature()
+    while True:
+        await asyncio.sleep(interval)
+        current = signature()
+        if current == last or current is None:
+            continue
+        last = current
+        config = load_config()
+        if not config:
+            # Unreadable or half-written file: keep the current settings rather than
+            # resetting every one of them to its default
+            logger.warning("Config reload skipped: config.json is empty or invalid.")
+            continue
+        changes = settings.apply(config)
+        for key, (old, new) in changes.items():
+            logger.warning(f"Config reloaded: {key} changed from {old} to {new}")
@@ -0,0 +1,365 @@
+"""
+Long-run soak harness.
+
+Runs the full run_netpulse() task graph - monitor, reports, retention, status API and
+config watcher - against a simulated network, a counting notifier and a throwaway
+database, on a virtual clock that jumps straight to the next timer whenever the loop
+is idle, so 90 days (every midnight reset, weekly and monthly report) run in about
+ten minutes.
+
+Once per simulated day it records RSS, tracemalloc's traced size and top allocators and
+the real time spent per monitor cycle. After a warm-up (baselines, 24h windows and
+retention need a week to reach steady state) any growth beyond the limits fails the run:
+
+    python -m internet_monitor.soak --days 90
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import selectors
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date, datetime, timedelta
+
+from internet_monitor import logging_setup, timekeeping
+from internet_monitor.db_manager import DatabaseManager, init_db
+from internet_monitor.main import run_netpulse
+from internet_monitor.timekeeping import NS_PER_SECOND, local_midnight_ns
+from internet_monitor.tracer import PathTracer
+
+logger = logging.getLogger(__name__)
+
+SOAK_DAYS = 90
+WARMUP_DAYS = 7
+SOAK_PING_INTERVAL = 15          # virtual seconds between monitor cycles
+START_DATE = date(2026, 1, 1)    # simulation starts at local midnight of this day
+SOAK_TARGETS = ["1.1.1.1", "8.8.8.8"]
+
+# Failure limits, measured from the end of the warm-up to the end of the run
+MAX_TRACED_GROWTH_KB = 1024
+MAX_RSS_GROWTH_KB = 16 * 1024
+MAX_CYCLE_SLOWDOWN = 2.0         # median real ms per cycle, last day vs end of warm-up
+TOP_ALLOCATORS = 5
+
+
+class _VirtualSelector:
+    """
+    Wraps the loop's selector: real I/O is only polled, never waited for, and an idle
+    wait of `timeout` seconds advances the loop's virtual clock instead of sleeping.
+    """
+
+    def __init__(self, selector):
+        self._selector = selector
+        self.loop = None
+
+    def select(self, timeout=None):
+        events = self._selector.select(0)
+        if not events and timeout:
+            self.loop.advance(timeout)
+        return events
+
+    def __getattr__(self, name):
+        return getattr(self._selector, name)
+
+
+class VirtualClockLoop(asyncio.SelectorEventLoop):
+    """
+    Event loop whose time() only moves when every task is waiting on a timer.
+    """
+
+    def __init__(self, start_ns):
+        selector = _VirtualSelector(selectors.DefaultSelector())
+        super().__init__(selector)
+        selector.loop = self
+        self.start_ns = start_ns
+        self._elapsed = 0.0
+
+    def time(self):
+        return self._elapsed
+
+    def advance(self, seconds):
+        self._elapsed += seconds
+
+    def wall_ns(self):
+        return self.start_ns + int(self._elapsed * NS_PER_SECOND)
+
+
+class SimulatedNetwork:
+    """
+    Deterministic stand-in for the system ping. Each simulated day has one full outage,
+    a few minutes of heavy loss on one target and an hour of elevated latency, at times
+    picked from the seeded RNG; the rest of the day is a healthy ~20 ms link.
+    """
+
+    def __init__(self, seed=1):
+        self.random = random.Random(seed)
+        self.base_rtt = {}
+        self.day = None
+        self.episodes = {}
+
+    def _plan_day(self, day):
+        rng = self.random
+        outage = rng.randrange(0, 86400 - 600)
+        loss = rng.randrange(0, 86400 - 900)
+        slow = rng.randrange(0, 86400 - 3600)
+        self.episodes = {
+            "outage": (outage, outage + rng.randrange(60, 600)),
+            "loss": (loss, loss + rng.randrange(120, 900)),
+            "slow": (slow, slow + 3600),
+        }
+        self.day = day
+
+    def _in(self, episode, second):
+        start, end = self.episodes[episode]
+        return start <= second < end
+
+    async def ping(self, host):
+        now = timekeeping.local_now()
+        if now.date() != self.day:
+            self._plan_day(now.date())
+        second = now.hour * 3600 + now.minute * 60 + now.second
+        if self._in("outage", second):
+            return False, None
+        if self._in("loss", second) and host == SOAK_TARGETS[-1] and self.random.random() < 0.3:
+            return False, None
+        base = self.base_rtt.setdefault(host, 15 + 10 * len(self.base_rtt))
+        rtt = base + self.random.expovariate(1 / 3)
+        if self._in("slow", second):
+            rtt += 150 + self.random.uniform(0, 100)
+        return True, round(rtt, 1)
+
+    async def ping_ttl(self, host, ttl):
+        """
+        Path trace probe: eight hops, the last one being the destination.
+        """
+        if ttl > 8:
+            return None, None, False
+        return (host if ttl == 8 else f"10.0.{ttl}.1"), 2.0 * ttl + self.random.random(), ttl == 8
+
+
+class CountingNotifier:
+    """
+    Drop-in for NotifierRegistry that only counts what it was asked to send.
+    """
+
+    def __init__(self):
+        self.counts = {"alerts": 0, "daily": 0, "weekly": 0, "monthly": 0}
+
+    async def send_alert(self, message: str):
+        for kind in ("Daily", "Weekly", "Monthly"):
+            if f"{kind} Internet Stats Report" in message:
+                self.counts[kind.lower()] += 1
+                return
+        self.counts["alerts"] += 1
+
+    def metrics(self):
+        return {"soak": dict(self.counts)}
+
+
+def rss_kb():
+    """
+    Current resident set size in KiB (peak RSS where /proc is not available).
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") // 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return 0  # Windows: RSS isn't sampled, the tracemalloc limits still apply
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+class SoakRecorder:
+    """
+    Times monitor cycles (in real time) and takes one memory sample per simulated day.
+    """
+
+    def __init__(self, loop: VirtualClockLoop, probe, top=TOP_ALLOCATORS):
+        self.loop = loop
+        self._probe = probe
+        self.top = top
+        self.cycle_started = None
+        self.cycle_virtual = None
+        self.cycle_ms = []
+        self.samples = []
+        self._ignore = [
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+        ]
+
+    async def probe(self, host):
+        # All targets of a cycle are probed at the same virtual instant, so a new
+        # virtual time marks a new cycle; the real time between two marks is one cycle.
+        if self.loop.time() != self.cycle_virtual:
+            started = time.perf_counter()
+            if self.cycle_started is not None:
+                self.cycle_ms.append((started - self.cycle_started) * 1000)
+            self.cycle_started = started
+            self.cycle_virtual = self.loop.time()
+        return await self._probe(host)
+
+    def sample(self, day):
+        snapshot = tracemalloc.take_snapshot().filter_traces(self._ignore)
+        traced, _ = tracemalloc.get_traced_memory()
+        cycle_ms = statistics.median(self.cycle_ms) if self.cycle_ms else 0.0
+        self.samples.append({
+            "day": day,
+            "date": timekeeping.format_local(timekeeping.now_ns(), "%Y-%m-%d"),
+            "rss_kb": rss_kb(),
+            "traced_kb": traced // 1024,
+            "cycles": len(self.cycle_ms),
+            "cycle_ms_p50": round(cycle_ms, 3),
+            "top": [
+                f"{stat.traceback[0].filename}:{stat.traceback[0].lineno} "
+                f"{stat.size // 1024} KiB in {stat.count} blocks"
+                for stat in snapshot.statistics("lineno")[:self.top]
+            ],
+        })
+        self.cycle_ms = []
+        return self.samples[-1]
+
+    async def run(self, days):
+        """
+        Sample shortly after every local midnight (after the daily reset) for `days` days.
+        """
+        for day in range(1, days + 1):
+            due_ns = local_midnight_ns() + 86400 * NS_PER_SECOND + 90 * NS_PER_SECOND
+            await asyncio.sleep((due_ns - timekeeping.now_ns()) / NS_PER_SECOND)
+            sample = self.sample(day)
+            print(
+                f"day {day:3d} {sample['date']}  rss {sample['rss_kb']:>7} KiB  "
+                f"traced {sample['traced_kb']:>6} KiB  cycle p50 {sample['cycle_ms_p50']:.3f} ms"
+            )
+
+
+def check(samples, warmup_days, max_traced_kb, max_rss_kb, max_slowdown):
+    """
+    Compare the last sample with the one at the end of the warm-up.
+    Returns a list of failure messages (empty when the run passed).
+    """
+    if len(samples) <= warmup_days:
+        return [f"run too short: {len(samples)} days recorded, warm-up is {warmup_days}"]
+    reference, last = samples[warmup_days - 1], samples[-1]
+    failures = []
+    traced_growth = last["traced_kb"] - reference["traced_kb"]
+    if traced_growth > max_traced_kb:
+        failures.append(f"traced memory grew {traced_growth} KiB (limit {max_traced_kb} KiB)")
+    rss_growth = last["rss_kb"] - reference["rss_kb"]
+    if rss_growth > max_rss_kb:
+        failures.append(f"RSS grew {rss_growth} KiB (limit {max_rss_kb} KiB)")
+    if reference["cycle_ms_p50"] and last["cycle_ms_p50"] > reference["cycle_ms_p50"] * max_slowdown:
+        failures.append(
+            f"median cycle time rose from {reference['cycle_ms_p50']:.3f} ms to "
+            f"{last['cycle_ms_p50']:.3f} ms (limit {max_slowdown}x)"
+        )
+    return failures
+
+
+def soak(days=SOAK_DAYS, warmup_days=WARMUP_DAYS, ping_interval=SOAK_PING_INTERVAL, seed=1,
+         workdir=None):
+    """
+    Run the soak in workdir (a temporary directory by default) and return
+    (samples, notifier counts, failures).
+    """
+    workdir = workdir or tempfile.mkdtemp(prefix="netpulse-soak-")
+    os.makedirs(workdir, exist_ok=True)
+    os.chdir(workdir)
+    config = {
+        "TARGETS": SOAK_TARGETS,
+        "PING_INTERVAL": ping_interval,
+        "CONFIG_POLL_INTERVAL": 60,
+        "STATUS_API_PORT": 0,
+    }
+    with open("config.json", "w", encoding="utf-8") as f:
+        json.dump(config, f, indent=2)
+
+    logging_setup.setup_logger()
+    # Outages are simulated every day; keep their warnings in the log file only
+    for handler in logging_setup._listener.handlers:
+        if type(handler) is logging.StreamHandler:
+            handler.setLevel(logging.CRITICAL)
+
+    start_ns = int(datetime.combine(START_DATE, datetime.min.time()).timestamp()) * NS_PER_SECOND
+    loop = VirtualClockLoop(start_ns)
+    timekeeping.use_clock(wall_ns=loop.wall_ns, monotonic_seconds=loop.time)
+    asyncio.set_event_loop(loop)
+
+    network = SimulatedNetwork(seed)
+    recorder = SoakRecorder(loop, network.ping)
+    notifier = CountingNotifier()
+    db_manager = DatabaseManager()
+    init_db(db_manager)
+    db_manager.connect().execute("PRAGMA synchronous=OFF")
+
+    tracemalloc.start()
+    app = loop.create_task(run_netpulse(
+        config, notifier, db_manager, probe=recorder.probe, tracer=PathTracer(network.ping_ttl)
+    ))
+    try:
+        loop.run_until_complete(recorder.run(days))
+    finally:
+        tracemalloc.stop()
+        app.cancel()
+        try:
+            loop.run_until_complete(app)
+        except asyncio.CancelledError:
+            pass
+        loop.close()
+        timekeeping.use_clock()
+        db_manager.close()
+
+    failures = check(recorder.samples, warmup_days, MAX_TRACED_GROWTH_KB, MAX_RSS_GROWTH_KB,
+                     MAX_CYCLE_SLOWDOWN)
+    # Every simulated Monday and 1st of the month must have produced its report
+    end = START_DATE + timedelta(days=days)
+    expected = {
+        "weekly": sum(1 for d in range(1, days) if (START_DATE + timedelta(days=d)).weekday() == 0),
+        "monthly": sum(1 for d in range(1, days) if (START_DATE + timedelta(days=d)).day == 1),
+    }
+    for kind, count in expected.items():
+        if notifier.counts[kind] < count:
+            failures.append(f"{notifier.counts[kind]} {kind} reports sent before {end}, expected {count}")
+    return recorder.samples, notifier.counts, failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run NetPulse on a virtual clock and check memory stays flat.")
+    parser.add_argument("--days", type=int, default=SOAK_DAYS)
+    parser.add_argument("--warmup-days", type=int, default=WARMUP_DAYS)
+    parser.add_argument("--interval", type=float, default=SOAK_PING_INTERVAL,
+                        help="virtual seconds between monitor cycles")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--workdir", help="directory for config, logs and database (default: temporary)")
+    parser.add_argument("--report", help="write the daily samples to this JSON file")
+    args = parser.parse_args(argv)
+    report = os.path.abspath(args.report) if args.report else None
+
+    samples, counts, failures = soak(args.days, args.warmup_days, args.interval, args.seed, args.workdir)
+
+    if report:
+        with open(report, "w", encoding="utf-8") as f:
+            json.dump({"samples": samples, "notifications": counts, "failures": failures}, f, indent=2)
+    if samples:
+        print("Top allocators on the last day:")
+        for line in samples[-1]["top"]:
+            print(f"  {line}")
+    print(f"Notifications: {counts}")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    print("Soak passed." if not failures else "Soak failed.")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
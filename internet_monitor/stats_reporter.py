@@ -1,23 +1,32 @@
 import asyncio
 import logging
-from datetime import datetime
+import sqlite3
 
 from internet_monitor.daily_stats import DailyStats
 from internet_monitor.db_manager import log_event, DatabaseManager
-from internet_monitor.alerts import TelegramAlerts
+from internet_monitor.notifiers import NotifierRegistry
+from internet_monitor.settings import Settings
+from internet_monitor.timekeeping import now_ns, local_now, local_midnight_ns, local_month_start_ns
 
 logger = logging.getLogger(__name__)
 
 DAILY_STATS_FILE = "daily_stats.log"
-STATS_ALERT_TIMES = ["07:00", "18:00"]
-RESET_TIME = "00:00"
+# Report and reset times come from Settings (STATS_ALERT_TIMES, RESET_TIME,
+# WEEKLY_STATS_ALERT_TIME, MONTHLY_STATS_ALERT_TIME) so they can be changed live.
 
-WEEKLY_STATS_ALERT_TIME = "09:00"    # Monday 9 AM
-MONTHLY_STATS_ALERT_TIME = "09:00"  # 1st day of month 9 AM
+def format_server_quality(server_quality):
+    """
+    One line per server with its jitter, loss burstiness and MOS estimate.
+    """
+    return "".join(
+        f"   • {server}: jitter {q['jitter']:.2f} ms, loss {q['packet_loss']:.2f}%, "
+        f"max burst {q['max_loss_burst']}, MOS {q['mos']:.2f}\n"
+        for server, q in server_quality.items()
+    )
 
 def log_daily_stats_to_file(stats):
     summary = (
-        f"Daily Stats Report ({datetime.now().strftime('%Y-%m-%d')}):\n"
+        f"Daily Stats Report ({local_now().strftime('%Y-%m-%d')}):\n"
         f"✅ Uptime: {stats['uptime'] / 60:.2f} min ({stats['uptime_percentage']:.2f}%)\n"
         f"❌ Downtime: {stats['downtime'] / 60:.2f} min ({stats['downtime_percentage']:.2f}%)\n"
         f"⚠️ High Pings: {stats['high_ping_count']} times\n"
@@ -26,7 +35,11 @@ def log_daily_stats_to_file(stats):
         f"📡 Packet Loss: {stats['packet_loss']:.2f}%\n"
         f"📈 Average Ping: {stats['average_ping']:.2f} ms\n"
         f"📊 Max Ping: {stats['max_ping']:.2f} ms\n"
+        f"〰️ Jitter: {stats['jitter']:.2f} ms\n"
+        f"🔁 Loss Bursts: max {stats['max_loss_burst']}, mean {stats['mean_loss_burst']:.2f} (burst ratio {stats['burst_ratio']:.2f})\n"
+        f"📞 Estimated MOS: {stats['mos']:.2f}\n"
         f"🏆 Most Stable Server: {stats['most_stable_server']}\n"
+        f"{format_server_quality(stats['server_quality'])}"
         f"⏳ Longest Downtime: {stats['longest_downtime'] / 60:.2f} min\n"
         f"🛑 *System Downtime*: {stats['system_downtime'] / 60:.2f} min\n"
         f"------------------------------------\n"
@@ -38,16 +51,16 @@ def log_daily_stats_to_db(db_manager: DatabaseManager, stats):
     conn = db_manager.connect()
     try:
         cursor = conn.cursor()
-        date_str = datetime.now().strftime('%Y-%m-%d')
-        time_str = datetime.now().strftime('%H:%M:%S')
+        ts = now_ns()
         cursor.execute("""
             INSERT INTO daily_stats (
-                date, time, uptime_seconds, downtime_seconds, high_ping_count,
+                ts, uptime_seconds, downtime_seconds, high_ping_count,
                 high_ping_seconds, internet_failures, total_pings, failed_pings,
-                average_ping, max_ping, longest_downtime, system_downtime_seconds
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                average_ping, max_ping, longest_downtime, system_downtime_seconds,
+                jitter, mos, max_loss_burst, mean_loss_burst, burst_ratio
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
         """, (
-            date_str, time_str,
+            ts,
             stats['uptime'],
             stats['downtime'],
             stats['high_ping_count'],
@@ -58,13 +71,29 @@ def log_daily_stats_to_db(db_manager: DatabaseManager, stats):
             stats['average_ping'],
             stats['max_ping'],
             stats['longest_downtime'],
-            stats['system_downtime']   # NEW
+            stats['system_downtime'],
+            stats['jitter'],
+            stats['mos'],
+            stats['max_loss_burst'],
+            stats['mean_loss_burst'],
+            stats['burst_ratio']
         ))
+        cursor.executemany("""
+            INSERT INTO daily_quality (
+                ts, target, packet_loss, average_rtt, jitter,
+                max_loss_burst, mean_loss_burst, ge_p, ge_r, mos
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, [
+            (
+                ts, server,
+                q['packet_loss'], q['average_rtt'], q['jitter'],
+                q['max_loss_burst'], q['mean_loss_burst'], q['ge_p'], q['ge_r'], q['mos']
+            )
+            for server, q in stats['server_quality'].items()
+        ])
         conn.commit()
     except Exception as e:
         logger.error(f"Failed to log daily stats to DB: {e}")
-    finally:
-        db_manager.close()
 
 def get_aggregated_stats(db_manager: DatabaseManager, period):
     """
@@ -87,10 +116,13 @@ def get_aggregated_stats(db_manager: DatabaseManager, period):
                     AVG(average_ping),
                     MAX(max_ping),
                     MAX(longest_downtime),
-                    SUM(system_downtime_seconds)
+                    SUM(system_downtime_seconds),
+                    AVG(jitter),
+                    AVG(mos),
+                    MAX(max_loss_burst)
                 FROM daily_stats
-                WHERE date >= date('now', '-6 days')
-            """)
+                WHERE ts >= ?
+            """, (local_midnight_ns(6),))
         elif period == 'monthly':
             cursor.execute("""
                 SELECT
@@ -104,10 +136,13 @@ def get_aggregated_stats(db_manager: DatabaseManager, period):
                     AVG(average_ping) as average_ping,
                     MAX(max_ping) as max_ping,
                     MAX(longest_downtime) as longest_downtime,
-                    SUM(system_downtime_seconds) as system_downtime_seconds
+                    SUM(system_downtime_seconds) as system_downtime_seconds,
+                    AVG(jitter) as jitter,
+                    AVG(mos) as mos,
+                    MAX(max_loss_burst) as max_loss_burst
                 FROM daily_stats
-                WHERE date >= date('now', 'start of month')
-            """)
+                WHERE ts >= ?
+            """, (local_month_start_ns(),))
         else:
             return None
 
@@ -124,7 +159,10 @@ def get_aggregated_stats(db_manager: DatabaseManager, period):
                 'average_ping': result[7] or 0,
                 'max_ping': result[8] or 0,
                 'longest_downtime': result[9] or 0,
-                'system_downtime': result[10] or 0
+                'system_downtime': result[10] or 0,
+                'jitter': result[11] or 0,
+                'mos': result[12] or 0,
+                'max_loss_burst': result[13] or 0
             }
             total_time = aggregated_stats['uptime'] + aggregated_stats['downtime']
             uptime_percentage = (aggregated_stats['uptime'] / total_time * 100) if total_time > 0 else 0
@@ -137,12 +175,13 @@ def get_aggregated_stats(db_manager: DatabaseManager, period):
         else:
             logger.warning(f"No data available for {period} stats.")
             return None
-    finally:
-        db_manager.close()
+    except sqlite3.Error as e:
+        logger.error(f"Failed to aggregate {period} stats: {e}")
+        return None
 
 def log_weekly_stats_to_file(stats):
     summary = (
-        f"Weekly Stats Report ({datetime.now().strftime('%Y-%m-%d')}):\n"
+        f"Weekly Stats Report ({local_now().strftime('%Y-%m-%d')}):\n"
         f"✅ Uptime: {stats['uptime'] / 60:.2f} min ({stats['uptime_percentage']:.2f}%)\n"
         f"❌ Downtime: {stats['downtime'] / 60:.2f} min ({stats['downtime_percentage']:.2f}%)\n"
         f"⚠️ High Pings: {stats['high_ping_count']} times\n"
@@ -151,6 +190,9 @@ def log_weekly_stats_to_file(stats):
         f"📡 Packet Loss: {stats['packet_loss']:.2f}%\n"
         f"📈 Average Ping: {stats['average_ping']:.2f} ms\n"
         f"📊 Max Ping: {stats['max_ping']:.2f} ms\n"
+        f"〰️ Jitter: {stats['jitter']:.2f} ms\n"
+        f"🔁 Longest Loss Burst: {stats['max_loss_burst']}\n"
+        f"📞 Estimated MOS: {stats['mos']:.2f}\n"
         f"⏳ Longest Downtime: {stats['longest_downtime'] / 60:.2f} min\n"
         f"🛑 *System Downtime*: {stats['system_downtime'] / 60:.2f} min\n"
         f"------------------------------------\n"
@@ -160,7 +202,7 @@ def log_weekly_stats_to_file(stats):
 
 def log_monthly_stats_to_file(stats):
     summary = (
-        f"Monthly Stats Report ({datetime.now().strftime('%Y-%m-%d')}):\n"
+        f"Monthly Stats Report ({local_now().strftime('%Y-%m-%d')}):\n"
         f"✅ Uptime: {stats['uptime'] / 60:.2f} min ({stats['uptime_percentage']:.2f}%)\n"
         f"❌ Downtime: {stats['downtime'] / 60:.2f} min ({stats['downtime_percentage']:.2f}%)\n"
         f"⚠️ High Pings: {stats['high_ping_count']} times\n"
@@ -169,6 +211,9 @@ def log_monthly_stats_to_file(stats):
         f"📡 Packet Loss: {stats['packet_loss']:.2f}%\n"
         f"📈 Average Ping: {stats['average_ping']:.2f} ms\n"
         f"📊 Max Ping: {stats['max_ping']:.2f} ms\n"
+        f"〰️ Jitter: {stats['jitter']:.2f} ms\n"
+        f"🔁 Longest Loss Burst: {stats['max_loss_burst']}\n"
+        f"📞 Estimated MOS: {stats['mos']:.2f}\n"
         f"⏳ Longest Downtime: {stats['longest_downtime'] / 60:.2f} min\n"
         f"🛑 *System Downtime*: {stats['system_downtime'] / 60:.2f} min\n"
         f"------------------------------------\n"
@@ -176,23 +221,25 @@ def log_monthly_stats_to_file(stats):
     with open(DAILY_STATS_FILE, "a", encoding='utf-8') as f:
         f.write(summary)
 
-async def send_daily_stats(alerts: TelegramAlerts, stats):
+async def send_daily_stats(alerts: NotifierRegistry, stats):
     summary = (
-        f"**📊 Daily Internet Stats Report ({datetime.now().strftime('%Y-%m-%d')}):**\n"
+        f"**📊 Daily Internet Stats Report ({local_now().strftime('%Y-%m-%d')}):**\n"
         f"✅ Uptime: {stats['uptime'] / 60:.2f} min ({stats['uptime_percentage']:.2f}%)\n"
         f"❌ Downtime: {stats['downtime'] / 60:.2f} min ({stats['downtime_percentage']:.2f}%)\n"
         f"⚠️ High Pings: {stats['high_ping_count']} times\n"
         f"⏱ Time in High Ping: {stats['high_ping_seconds'] / 60:.2f} min\n"
         f"🚨 Total number of Internet Failures: {stats['internet_failures']} times\n"
         f"⏱ Time in Internet Failure: {stats['downtime'] / 60:.2f} min\n"
+        f"〰️ Jitter: {stats['jitter']:.2f} ms | 📞 MOS: {stats['mos']:.2f}\n"
+        f"🔁 Longest Loss Burst: {stats['max_loss_burst']}\n"
         f"⏳ Longest Downtime: {stats['longest_downtime'] / 60:.2f} min\n"
         f"🛑 *System Downtime*: {stats['system_downtime'] / 60:.2f} min\n"
     )
     await alerts.send_alert(summary)
 
-async def send_weekly_stats(alerts: TelegramAlerts, stats):
+async def send_weekly_stats(alerts: NotifierRegistry, stats):
     summary = (
-        f"**📊 Weekly Internet Stats Report ({datetime.now().strftime('%Y-%m-%d')}):**\n"
+        f"**📊 Weekly Internet Stats Report ({local_now().strftime('%Y-%m-%d')}):**\n"
         f"✅ Uptime: {stats['uptime'] / 3600:.2f} hrs ({stats['uptime_percentage']:.2f}%)\n"
         f"❌ Downtime: {stats['downtime'] / 3600:.2f} hrs ({stats['downtime_percentage']:.2f}%)\n"
         f"⚠️ High Pings: {stats['high_ping_count']} times\n"
@@ -201,14 +248,17 @@ async def send_weekly_stats(alerts: TelegramAlerts, stats):
         f"📡 Packet Loss: {stats['packet_loss']:.2f}%\n"
         f"📈 Average Ping: {stats['average_ping']:.2f} ms\n"
         f"📊 Max Ping: {stats['max_ping']:.2f} ms\n"
+        f"〰️ Jitter: {stats['jitter']:.2f} ms\n"
+        f"🔁 Longest Loss Burst: {stats['max_loss_burst']}\n"
+        f"📞 Estimated MOS: {stats['mos']:.2f}\n"
         f"⏳ Longest Downtime: {stats['longest_downtime'] / 60:.2f} min\n"
         f"🛑 *System Downtime*: {stats['system_downtime'] / 60:.2f} min\n"
     )
     await alerts.send_alert(summary)
 
-async def send_monthly_stats(alerts: TelegramAlerts, stats):
+async def send_monthly_stats(alerts: NotifierRegistry, stats):
     summary = (
-        f"**📊 Monthly Internet Stats Report ({datetime.now().strftime('%Y-%m-%d')}):**\n"
+        f"**📊 Monthly Internet Stats Report ({local_now().strftime('%Y-%m-%d')}):**\n"
         f"✅ Uptime: {stats['uptime'] / 3600:.2f} hrs ({stats['uptime_percentage']:.2f}%)\n"
         f"❌ Downtime: {stats['downtime'] / 3600:.2f} hrs ({stats['downtime_percentage']:.2f}%)\n"
         f"⚠️ High Pings: {stats['high_ping_count']} times\n"
@@ -217,28 +267,33 @@ async def send_monthly_stats(alerts: TelegramAlerts, stats):
         f"📡 Packet Loss: {stats['packet_loss']:.2f}%\n"
         f"📈 Average Ping: {stats['average_ping']:.2f} ms\n"
         f"📊 Max Ping: {stats['max_ping']:.2f} ms\n"
+        f"〰️ Jitter: {stats['jitter']:.2f} ms\n"
+        f"🔁 Longest Loss Burst: {stats['max_loss_burst']}\n"
+        f"📞 Estimated MOS: {stats['mos']:.2f}\n"
         f"⏳ Longest Downtime: {stats['longest_downtime'] / 60:.2f} min\n"
         f"🛑 *System Downtime*: {stats['system_downtime'] / 60:.2f} min\n"
     )
     await alerts.send_alert(summary)
 
 async def periodic_stats_report(
-    alerts: TelegramAlerts,
+    alerts: NotifierRegistry,
     daily_stats: DailyStats,
-    db_manager: DatabaseManager
+    db_manager: DatabaseManager,
+    settings: Settings = None
 ):
     """
     Periodically sends daily/weekly/monthly stats reports at specified times.
     Resets daily stats at midnight.
     """
+    settings = settings if settings is not None else Settings()
     while True:
-        now = datetime.now()
+        now = local_now()
         current_time = now.strftime("%H:%M")
         current_weekday = now.weekday()  # Monday=0
         current_day = now.day
 
         # Daily Stats
-        if current_time in STATS_ALERT_TIMES:
+        if current_time in settings.stats_alert_times:
             stats = daily_stats.get_summary()
             log_daily_stats_to_file(stats)
             # We need daily_stats to know db_manager or pass it in:
@@ -246,11 +301,11 @@ async def periodic_stats_report(
             await send_daily_stats(alerts, stats)
 
         # Reset daily stats at midnight
-        if current_time == RESET_TIME:
+        if current_time == settings.reset_time:
             daily_stats.reset()
 
         # Weekly Stats on Monday
-        if current_time == WEEKLY_STATS_ALERT_TIME and current_weekday == 0:
+        if current_time == settings.weekly_stats_alert_time and current_weekday == 0:
             weekly_stats = get_aggregated_stats(db_manager, 'weekly')
             if weekly_stats:
                 log_weekly_stats_to_file(weekly_stats)
@@ -258,7 +313,7 @@ async def periodic_stats_report(
                 await send_weekly_stats(alerts, weekly_stats)
 
         # Monthly Stats on 1st day
-        if current_time == MONTHLY_STATS_ALERT_TIME and current_day == 1:
+        if current_time == settings.monthly_stats_alert_time and current_day == 1:
             monthly_stats = get_aggregated_stats(db_manager, 'monthly')
             if monthly_stats:
                 log_monthly_stats_to_file(monthly_stats)
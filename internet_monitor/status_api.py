@@ -0,0 +1,154 @@
+import asyncio
+import json
+import logging
+from collections import deque
+
+from internet_monitor.timekeeping import now_ns
+
+logger = logging.getLogger(__name__)
+
+STATUS_API_HOST = "127.0.0.1"
+STATUS_API_PORT = 8765
+RECENT_SAMPLES = 300           # monitor cycles kept for /samples
+MAX_REQUEST_BYTES = 8192
+KEEPALIVE_TIMEOUT = 15         # seconds an idle keep-alive connection is held open
+
+_REASONS = {200: "OK", 304: "Not Modified", 404: "Not Found", 405: "Method Not Allowed",
+            400: "Bad Request"}
+
+
+class StatusBoard:
+    """
+    In-memory state behind the status API. The monitor records each cycle, which bumps the
+    version; every endpoint is serialized at most once per version and served from that
+    cache with an ETag, so polling clients never reach SQLite and rarely re-encode anything.
+    """
+
+    def __init__(self, recent=RECENT_SAMPLES):
+        self.version = 0
+        # Per-process prefix for ETags: version restarts at 0, so without it a client could
+        # get a 304 for different content that happens to have the same version and length
+        self.instance = f"{now_ns():x}"
+        self.updated_at = None
+        self.current = {}
+        self.samples = deque(maxlen=recent)
+        self.producers = {
+            "/status": self._status,
+            "/samples": lambda: list(self.samples),
+        }
+        self._cache = {}  # path -> (version, etag, body)
+
+    def register(self, path, producer):
+        """
+        Expose producer() (returning JSON-serializable data) at path.
+        """
+        self.producers[path] = producer
+
+    def record_cycle(self, servers, status, ping_times, high_ping_flags):
+        ts = now_ns()
+        for server, up, ping_time, high in zip(servers, status, ping_times, high_ping_flags):
+            self.current[server] = {"up": up, "ping": ping_time, "high_ping": bool(high), "ts": ts}
+        self.samples.append({"ts": ts, "status": list(status), "ping_times": list(ping_times)})
+        self.updated_at = ts
+        self.version += 1
+
+    def forget(self, server):
+        self.current.pop(server, None)
+
+    def _status(self):
+        return {"version": self.version, "updated_at": self.updated_at, "targets": self.current}
+
+    def render(self, path):
+        """
+        Return (etag, body) for path, or None if there is no such endpoint.
+        """
+        producer = self.producers.get(path)
+        if producer is None:
+            return None
+        cached = self._cache.get(path)
+        if cached is None or cached[0] != self.version:
+            body = json.dumps(producer(), default=str).encode("utf-8")
+            cached = (self.version, f'"{self.instance}-{self.version}-{len(body)}"', body)
+            self._cache[path] = cached
+        return cached[1], cached[2]
+
+
+def _response(status, body=b"", etag=None, keep_alive=True):
+    headers = [
+        f"HTTP/1.1 {status} {_REASONS[status]}",
+        "Content-Type: application/json",
+        f"Content-Length: {len(body)}",
+        "Cache-Control: no-cache",
+        f"Connection: {'keep-alive' if keep_alive else 'close'}",
+    ]
+    if etag:
+        headers.append(f"ETag: {etag}")
+    return ("\r\n".join(headers) + "\r\n\r\n").encode("latin-1") + body
+
+
+async def _handle(board: StatusBoard, reader, writer):
+    try:
+        while True:
+            try:
+                head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), KEEPALIVE_TIMEOUT)
+            except (asyncio.IncompleteReadError, asyncio.TimeoutError):
+                break
+            except asyncio.LimitOverrunError:
+                writer.write(_response(400, keep_alive=False))
+                break
+            lines = head.decode("latin-1").split("\r\n")
+            parts = lines[0].split()
+            if len(parts) != 3:
+                writer.write(_response(400, keep_alive=False))
+                break
+            method, target, version = parts
+            headers = {}
+            for line in lines[1:]:
+                if ":" in line:
+                    name, value = line.split(":", 1)
+                    headers[name.strip().lower()] = value.strip()
+            keep_alive = headers.get("connection", "").lower() != "close" and version == "HTTP/1.1"
+
+            if method not in ("GET", "HEAD"):
+                writer.write(_response(405, keep_alive=keep_alive))
+            else:
+                rendered = board.render(target.split("?", 1)[0].rstrip("/") or "/status")
+                if rendered is None:
+                    writer.write(_response(404, keep_alive=keep_alive))
+                else:
+                    etag, body = rendered
+                    if headers.get("if-none-match") == etag:
+                        writer.write(_response(304, etag=etag, keep_alive=keep_alive))
+                    else:
+                        response = _response(200, body, etag, keep_alive)
+                        if method == "HEAD":
+                            response = response[:len(response) - len(body)]
+                        writer.write(response)
+            await writer.drain()
+            if not keep_alive:
+                break
+    except ConnectionError:
+        pass
+    finally:
+        writer.close()
+
+
+async def serve_status_api(board: StatusBoard, host=STATUS_API_HOST, port=STATUS_API_PORT):
+    """
+    Serve the read-only JSON status API until cancelled. port=None ("STATUS_API_PORT": null
+    in config.json) disables it. The API is optional, so failing to bind is logged and the
+    coroutine returns rather than taking the monitor down with it.
+    """
+    if port is None:
+        logger.info("Status API disabled.")
+        return
+    try:
+        server = await asyncio.start_server(
+            lambda r, w: _handle(board, r, w), host, port, limit=MAX_REQUEST_BYTES
+        )
+    except OSError as e:
+        logger.error(f"Status API not started, could not listen on {host}:{port}: {e}")
+        return
+    logger.info(f"Status API listening on http://{host}:{port}")
+    async with server:
+        await server.serve_forever()
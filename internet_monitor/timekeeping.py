@@ -0,0 +1,80 @@
+"""
+The two clocks NetPulse uses:
+
+* now_ns()     - wall-clock time as integer epoch nanoseconds (UTC). Used for everything
+                 that is stored, compared or indexed in the database.
+* monotonic()  - seconds from a clock that never jumps. Used for elapsed-time accounting,
+                 so NTP steps and DST changes can't inflate or erase uptime/downtime.
+
+Local time only appears when rendering reports and alerts (format_local), for
+schedules (local_now) or when a local calendar boundary is needed for a query
+(local_midnight_ns, local_month_start_ns).
+
+Both clocks can be replaced with use_clock(), which the soak harness does to run
+NetPulse on an accelerated virtual clock.
+"""
+
+import time
+from datetime import datetime, timedelta
+
+NS_PER_SECOND = 1_000_000_000
+NS_PER_HOUR = 3600 * NS_PER_SECOND
+NS_PER_DAY = 24 * NS_PER_HOUR
+
+_wall_ns = time.time_ns
+_monotonic = time.monotonic
+
+
+def use_clock(wall_ns=None, monotonic_seconds=None):
+    """
+    Replace the clock sources (pass nothing to restore the real ones).
+    """
+    global _wall_ns, _monotonic
+    _wall_ns = wall_ns or time.time_ns
+    _monotonic = monotonic_seconds or time.monotonic
+
+
+def now_ns():
+    return _wall_ns()
+
+
+def monotonic():
+    return _monotonic()
+
+
+def local_now():
+    """
+    Current local time as a naive datetime, for schedules and report headers.
+    """
+    return to_local(now_ns())
+
+
+def to_local(ts_ns):
+    """
+    Convert epoch nanoseconds to a naive local datetime for display.
+    """
+    return datetime.fromtimestamp(ts_ns / NS_PER_SECOND)
+
+
+def format_local(ts_ns, fmt="%Y-%m-%d %H:%M:%S"):
+    return to_local(ts_ns).strftime(fmt)
+
+
+def days_ago_ns(days):
+    return now_ns() - days * NS_PER_DAY
+
+
+def local_midnight_ns(days_ago=0):
+    """
+    Epoch nanoseconds of local midnight `days_ago` days before today (DST-aware).
+    """
+    day = local_now().date() - timedelta(days=days_ago)
+    return int(datetime.combine(day, datetime.min.time()).timestamp()) * NS_PER_SECOND
+
+
+def local_month_start_ns():
+    """
+    Epoch nanoseconds of local midnight on the first day of the current month.
+    """
+    day = local_now().date().replace(day=1)
+    return int(datetime.combine(day, datetime.min.time()).timestamp()) * NS_PER_SECOND
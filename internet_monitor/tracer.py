@@ -0,0 +1,357 @@
+import asyncio
+import itertools
+import logging
+import random
+import re
+import socket
+import struct
+import subprocess
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+MAX_HOPS = 20
+TRACE_ROUNDS = 5              # MTR-style rounds per incident
+ROUND_INTERVAL = 2            # seconds between rounds
+PROBE_TIMEOUT_MS = 1000
+
+# Probe modes, shown in every trace summary
+MODE_SOCKET = "icmp socket"       # per-hop loss and RTT
+MODE_PING = "system ping"         # per-hop loss; RTT for the destination only
+MAX_CONCURRENT_TRACES = 2     # hard cap, so a wide outage can't start a probe storm
+
+_REPLY_FROM = re.compile(r"(?:Reply from|From) ([0-9A-Fa-f.:]+?):? ")
+_REPLY_TIME = re.compile(r"time[=<]([\d.]+) ?ms")
+
+
+async def ping_ttl(host, ttl):
+    """
+    Send one TTL-limited ping to host with the system 'ping'.
+    Returns (responder, rtt_ms, reached): responder is the address that answered (None on
+    timeout), rtt_ms the time ping reported (None for intermediate hops) and reached is
+    True when the destination itself replied.
+    """
+    try:
+        proc = await asyncio.create_subprocess_exec(
+            "ping", "-n", "1", "-w", str(PROBE_TIMEOUT_MS), "-i", str(ttl), host,
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE
+        )
+        stdout, _ = await proc.communicate()
+    except Exception as e:
+        logger.error(f"Trace probe failed for host {host} (ttl {ttl}): {e}")
+        return None, None, False
+
+    return parse_ttl_reply(stdout.decode("utf-8", errors="ignore"))
+
+
+def parse_ttl_reply(output):
+    """
+    Parse the output of one TTL-limited ping into (responder, rtt_ms, reached).
+    Only an echo reply from the destination reports a time; intermediate hops ("TTL expired
+    in transit") don't, and timing the whole ping process instead would mostly measure
+    process start-up, so their RTT is None and only their loss is reported (MODE_PING).
+    """
+    match = _REPLY_FROM.search(output)
+    if not match:
+        return None, None, False
+    time_match = _REPLY_TIME.search(output)
+    if time_match is None:
+        return match.group(1), None, False
+    return match.group(1), float(time_match.group(1)), True
+
+
+_ICMP_ECHO_REPLY = 0
+_ICMP_DEST_UNREACHABLE = 3
+_ICMP_ECHO_REQUEST = 8
+_ICMP_TIME_EXCEEDED = 11
+
+
+def _icmp_checksum(data):
+    if len(data) % 2:
+        data += b"\0"
+    total = sum(struct.unpack(f"!{len(data) // 2}H", data))
+    total = (total >> 16) + (total & 0xFFFF)
+    total += total >> 16
+    return ~total & 0xFFFF
+
+
+def build_echo_request(ident, seq, payload=b"netpulse-trace"):
+    header = struct.pack("!BBHHH", _ICMP_ECHO_REQUEST, 0, 0, ident, seq)
+    checksum = _icmp_checksum(header + payload)
+    return struct.pack("!BBHHH", _ICMP_ECHO_REQUEST, 0, checksum, ident, seq) + payload
+
+
+def parse_icmp_packet(packet, ident):
+    """
+    Parse an IPv4 packet read from a raw ICMP socket. Returns (seq, reached) when it answers
+    one of our echo requests (an echo reply, or a Time Exceeded / Destination Unreachable
+    quoting our request), else None.
+    """
+    if len(packet) < 20:
+        return None
+    icmp = packet[(packet[0] & 0x0F) * 4:]
+    if len(icmp) < 8:
+        return None
+    icmp_type = icmp[0]
+    if icmp_type == _ICMP_ECHO_REPLY:
+        reply_ident, seq = struct.unpack("!HH", icmp[4:8])
+        return (seq, True) if reply_ident == ident else None
+    if icmp_type in (_ICMP_TIME_EXCEEDED, _ICMP_DEST_UNREACHABLE):
+        # The error quotes our original IP header plus the first 8 bytes of the echo request
+        quoted = icmp[8:]
+        if len(quoted) < 20:
+            return None
+        original = quoted[(quoted[0] & 0x0F) * 4:]
+        if len(original) < 8 or original[0] != _ICMP_ECHO_REQUEST:
+            return None
+        request_ident, seq = struct.unpack("!HH", original[4:8])
+        return (seq, False) if request_ident == ident else None
+    return None
+
+
+class IcmpProber:
+    """
+    TTL-limited ICMP echo probes over one raw socket, timed from send to the Time Exceeded
+    (or echo) reply, so every hop gets a real RTT rather than the cost of starting a process.
+    Replies are read on a small daemon thread, which works with any event loop (including
+    the Proactor loop on Windows). Needs raw-socket rights: Administrator on Windows,
+    root or CAP_NET_RAW on Linux/macOS. IPv4 only; other targets fall back to ping_ttl.
+    """
+    mode = MODE_SOCKET
+
+    def __init__(self):
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_RAW, socket.IPPROTO_ICMP)
+        try:
+            # Windows only delivers to raw sockets that are bound
+            self.sock.bind(("0.0.0.0", 0))
+        except OSError:
+            pass
+        self.sock.settimeout(0.5)
+        self.ident = random.randrange(1, 0xFFFF)
+        self._seq = itertools.count(random.randrange(0xFFFF))
+        self._pending = {}  # seq -> (loop, future, sent_at)
+        self._lock = threading.Lock()
+        self._reader = None
+
+    def _ensure_reader(self):
+        if self._reader is None:
+            self._reader = threading.Thread(target=self._read_replies, name="trace-icmp", daemon=True)
+            self._reader.start()
+
+    def _read_replies(self):
+        while True:
+            try:
+                packet, (responder, _) = self.sock.recvfrom(2048)
+            except socket.timeout:
+                continue
+            except OSError:
+                return  # socket closed
+            received_at = time.perf_counter()
+            parsed = parse_icmp_packet(packet, self.ident)
+            if parsed is None:
+                continue
+            seq, reached = parsed
+            with self._lock:
+                entry = self._pending.pop(seq, None)
+            if entry is None:
+                continue
+            loop, future, sent_at = entry
+            result = (responder, (received_at - sent_at) * 1000, reached)
+            loop.call_soon_threadsafe(lambda f=future, r=result: f.done() or f.set_result(r))
+
+    async def __call__(self, host, ttl):
+        try:
+            socket.inet_aton(host)
+        except OSError:
+            return await ping_ttl(host, ttl)
+        self._ensure_reader()
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        seq = next(self._seq) & 0xFFFF
+        with self._lock:
+            self._pending[seq] = (loop, future, time.perf_counter())
+        try:
+            # No await between setting the TTL and sending, so concurrent probes can't interleave
+            self.sock.setsockopt(socket.IPPROTO_IP, socket.IP_TTL, ttl)
+            self.sock.sendto(build_echo_request(self.ident, seq), (host, 0))
+            return await asyncio.wait_for(future, PROBE_TIMEOUT_MS / 1000)
+        except asyncio.TimeoutError:
+            return None, None, False
+        except OSError as e:
+            logger.error(f"Trace probe failed for host {host} (ttl {ttl}): {e}")
+            return None, None, False
+        finally:
+            with self._lock:
+                self._pending.pop(seq, None)
+
+    def close(self):
+        self.sock.close()
+
+
+def default_probe():
+    """
+    Return (probe, mode): raw ICMP sockets when the process may open them, else system ping.
+    """
+    try:
+        probe = IcmpProber()
+    except OSError as e:
+        logger.info(f"Path traces use the system ping (per-hop loss only): no raw ICMP socket ({e}).")
+        return ping_ttl, MODE_PING
+    logger.info("Path traces use a raw ICMP socket (per-hop loss and RTT).")
+    return probe, MODE_SOCKET
+
+
+class HopStats:
+    """
+    Running loss and RTT figures for one TTL, MTR style.
+    """
+
+    def __init__(self):
+        self.address = None
+        self.sent = 0
+        self.received = 0
+        self.timed = 0        # replies that carried an RTT
+        self.rtt_sum = 0.0
+        self.rtt_best = None
+        self.rtt_worst = None
+
+    def add(self, responder, rtt):
+        self.sent += 1
+        if responder is None:
+            return
+        self.address = responder
+        self.received += 1
+        if rtt is None:
+            return
+        self.timed += 1
+        self.rtt_sum += rtt
+        self.rtt_best = rtt if self.rtt_best is None else min(self.rtt_best, rtt)
+        self.rtt_worst = rtt if self.rtt_worst is None else max(self.rtt_worst, rtt)
+
+    def summary(self):
+        return {
+            "address": self.address,
+            "loss": (1 - self.received / self.sent) * 100 if self.sent else 0.0,
+            "avg": self.rtt_sum / self.timed if self.timed else None,
+            "best": self.rtt_best,
+            "worst": self.rtt_worst,
+        }
+
+
+class Trace:
+    """
+    One incident's path trace. Every round probes all TTLs at once rather than hop by hop;
+    rounds repeat until TRACE_ROUNDS is reached or stop() is called.
+    """
+
+    def __init__(self, target, probe, on_done, mode=None):
+        self.target = target
+        self.probe = probe
+        self.mode = mode
+        self.hops = {}
+        self.rounds = 0
+        self.max_ttl = MAX_HOPS
+        self.destination_ttl = None
+        self._on_done = on_done
+        self.task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        try:
+            while self.rounds < TRACE_ROUNDS:
+                await self._round()
+                self.rounds += 1
+                if self.rounds < TRACE_ROUNDS:
+                    await asyncio.sleep(ROUND_INTERVAL)
+        finally:
+            self._on_done(self)
+
+    async def _round(self):
+        ttls = range(1, self.max_ttl + 1)
+        results = await asyncio.gather(*(self.probe(self.target, ttl) for ttl in ttls))
+        for ttl, (responder, rtt, reached) in zip(ttls, results):
+            self.hops.setdefault(ttl, HopStats()).add(responder, rtt)
+            if reached and (self.destination_ttl is None or ttl < self.destination_ttl):
+                self.destination_ttl = ttl
+        # Once the destination answered, later rounds only need the hops up to it
+        if self.destination_ttl is not None:
+            self.max_ttl = self.destination_ttl
+            for ttl in [t for t in self.hops if t > self.destination_ttl]:
+                del self.hops[ttl]
+
+    async def stop(self):
+        """
+        Stop probing and return the compact result.
+        """
+        if not self.task.done():
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+        return self.summary()
+
+    def summary(self):
+        """
+        Return {"target", "mode", "rounds", "reached", "hops": [...]} with trailing silent
+        hops trimmed.
+        """
+        hops = [dict(ttl=ttl, **self.hops[ttl].summary()) for ttl in sorted(self.hops)]
+        while hops and hops[-1]["address"] is None:
+            hops.pop()
+        return {
+            "target": self.target,
+            "mode": self.mode,
+            "rounds": self.rounds,
+            "reached": self.destination_ttl is not None,
+            "hops": hops,
+        }
+
+
+def format_trace(summary):
+    """
+    Render a trace summary as a short fixed-width table for alerts and the event log.
+    """
+    mode = f", {summary['mode']}" if summary.get("mode") else ""
+    lines = [f"Path to {summary['target']} ({summary['rounds']} rounds{mode})"]
+    for hop in summary["hops"]:
+        if hop["address"] is None:
+            lines.append(f"{hop['ttl']:>2}  *")
+            continue
+        line = f"{hop['ttl']:>2}  {hop['address']:<15} loss {hop['loss']:5.1f}%"
+        # With the system ping only the destination's replies carry an RTT
+        if hop["avg"] is not None:
+            line += f"  avg {hop['avg']:6.1f}ms  worst {hop['worst']:6.1f}ms"
+        lines.append(line)
+    if not summary["reached"]:
+        last = next((h for h in reversed(summary["hops"]) if h["address"]), None)
+        lines.append(f"Destination not reached; last responding hop: {last['address'] if last else 'none'}")
+    return "\n".join(lines)
+
+
+class PathTracer:
+    """
+    Starts incident traces, refusing new ones once MAX_CONCURRENT_TRACES are running.
+    By default probes go through a raw ICMP socket, falling back to the system ping (see
+    default_probe); the probe coroutine can also be swapped for a simulated responder.
+    """
+
+    def __init__(self, probe=None, max_concurrent=MAX_CONCURRENT_TRACES, mode=None):
+        if probe is None:
+            probe, mode = default_probe()
+        self.probe = probe
+        self.mode = mode or getattr(probe, "mode", None)
+        self.max_concurrent = max_concurrent
+        self.active = set()
+
+    def start(self, target):
+        """
+        Start tracing target and return the Trace, or None if the concurrency cap is reached.
+        """
+        if len(self.active) >= self.max_concurrent:
+            logger.warning(f"Path trace to {target} skipped: {len(self.active)} traces already running.")
+            return None
+        trace = Trace(target, self.probe, self.active.discard, self.mode)
+        self.active.add(trace)
+        logger.info(f"Path trace to {target} started.")
+        return trace
@@ -0,0 +1,224 @@
+import logging
+from bisect import bisect_left
+
+from internet_monitor.timekeeping import monotonic
+
+logger = logging.getLogger(__name__)
+
+# Window name -> length in seconds
+WINDOWS = {"1m": 60, "5m": 300, "1h": 3600, "24h": 86400}
+BUCKETS_PER_WINDOW = 60
+
+# Upper edges (ms) of the latency histogram bins used for percentiles, 1.25x apart (1 ms - ~12 s)
+LATENCY_BIN_EDGES = [1.25 ** i for i in range(43)]
+
+AGGREGATE = "all"  # pseudo-target for the connection as a whole
+
+# Default alert rules: (target, window, metric, threshold) -> alert while metric > threshold
+WINDOW_RULES = [
+    (AGGREGATE, "5m", "packet_loss", 5.0),
+]
+MIN_RULE_SAMPLES = 30  # don't judge a window on a handful of probes (e.g. right after start)
+
+
+class RollingWindow:
+    """
+    Counters for the last `length` seconds, kept as a ring of BUCKETS_PER_WINDOW buckets.
+    Running totals are adjusted as buckets enter and leave the window, so an update is O(1)
+    and a query only looks at the totals (plus the fixed-size bucket ring for the max).
+    """
+
+    def __init__(self, length, buckets=BUCKETS_PER_WINDOW):
+        self.length = length
+        self.buckets = buckets
+        self.bucket_seconds = length / buckets
+        bins = len(LATENCY_BIN_EDGES) + 1
+        self.probes = [0] * buckets
+        self.lost = [0] * buckets
+        self.rtt_sum = [0.0] * buckets
+        self.rtt_max = [0.0] * buckets
+        self.histogram = [[0] * bins for _ in range(buckets)]
+        self.total_probes = 0
+        self.total_lost = 0
+        self.total_rtt_sum = 0.0
+        self.total_histogram = [0] * bins
+        self.epoch = None  # absolute index of the newest bucket
+
+    def _advance(self, now):
+        epoch = int(now // self.bucket_seconds)
+        if self.epoch is None:
+            self.epoch = epoch
+            return
+        # Expire every bucket between the last one written and now (at most one full ring)
+        for e in range(self.epoch + 1, min(epoch, self.epoch + self.buckets) + 1):
+            self._clear(e % self.buckets)
+        if epoch > self.epoch:
+            self.epoch = epoch
+
+    def _clear(self, i):
+        self.total_probes -= self.probes[i]
+        self.total_lost -= self.lost[i]
+        self.total_rtt_sum -= self.rtt_sum[i]
+        bucket_histogram = self.histogram[i]
+        for b, count in enumerate(bucket_histogram):
+            if count:
+                self.total_histogram[b] -= count
+                bucket_histogram[b] = 0
+        self.probes[i] = 0
+        self.lost[i] = 0
+        self.rtt_sum[i] = 0.0
+        self.rtt_max[i] = 0.0
+        if self.total_probes == 0:
+            # Don't let float rounding accumulate across an empty window
+            self.total_rtt_sum = 0.0
+
+    def add(self, now, rtt):
+        """
+        Record one probe at monotonic time `now`; rtt is in ms, or None if the probe was lost.
+        """
+        self._advance(now)
+        i = self.epoch % self.buckets
+        self.probes[i] += 1
+        self.total_probes += 1
+        if rtt is None:
+            self.lost[i] += 1
+            self.total_lost += 1
+            return
+        self.rtt_sum[i] += rtt
+        self.total_rtt_sum += rtt
+        if rtt > self.rtt_max[i]:
+            self.rtt_max[i] = rtt
+        b = bisect_left(LATENCY_BIN_EDGES, rtt)
+        self.histogram[i][b] += 1
+        self.total_histogram[b] += 1
+
+    def _percentile(self, fraction, received, max_rtt):
+        rank = fraction * received
+        seen = 0
+        for b, count in enumerate(self.total_histogram):
+            if count and seen + count >= rank:
+                # Interpolate linearly inside the bin that holds the rank
+                lower = LATENCY_BIN_EDGES[b - 1] if b > 0 else 0.0
+                upper = LATENCY_BIN_EDGES[b] if b < len(LATENCY_BIN_EDGES) else max_rtt
+                return min(lower + (upper - lower) * (rank - seen) / count, max_rtt)
+            seen += count
+        return max_rtt
+
+    def summary(self, now=None):
+        """
+        Return uptime %, loss %, mean/max RTT and p50/p95/p99 estimates over the window.
+        """
+        self._advance(monotonic() if now is None else now)
+        probes = self.total_probes
+        received = probes - self.total_lost
+        loss = self.total_lost / probes * 100 if probes else 0.0
+        max_rtt = max(self.rtt_max)
+        return {
+            "samples": probes,
+            "uptime_percentage": 100 - loss if probes else 0.0,
+            "packet_loss": loss,
+            "average_ping": self.total_rtt_sum / received if received else 0.0,
+            "max_ping": max_rtt,
+            "p50_ping": self._percentile(0.50, received, max_rtt) if received else 0.0,
+            "p95_ping": self._percentile(0.95, received, max_rtt) if received else 0.0,
+            "p99_ping": self._percentile(0.99, received, max_rtt) if received else 0.0,
+        }
+
+
+class SlidingStats:
+    """
+    Rolling 1m/5m/1h/24h windows per target, plus an AGGREGATE pseudo-target that records
+    the best RTT of each cycle and counts a loss only when every target failed.
+    """
+
+    def __init__(self, windows=None):
+        self.window_lengths = dict(windows or WINDOWS)
+        self.targets = {}
+
+    def _windows_for(self, target):
+        windows = self.targets.get(target)
+        if windows is None:
+            windows = {name: RollingWindow(length) for name, length in self.window_lengths.items()}
+            self.targets[target] = windows
+        return windows
+
+    def add(self, target, rtt, now=None):
+        now = monotonic() if now is None else now
+        for window in self._windows_for(target).values():
+            window.add(now, rtt)
+
+    def add_cycle(self, servers, status, ping_times, now=None):
+        """
+        Record one monitor cycle for every server and for the aggregate.
+        """
+        now = monotonic() if now is None else now
+        answered = []
+        for server, up, ping_time in zip(servers, status, ping_times):
+            if not up:
+                self.add(server, None, now)
+            elif ping_time is not None:
+                self.add(server, ping_time, now)
+                answered.append(ping_time)
+        if answered:
+            self.add(AGGREGATE, min(answered), now)
+        elif not any(status):
+            self.add(AGGREGATE, None, now)
+
+    def remove(self, target):
+        self.targets.pop(target, None)
+
+    def query(self, target, window):
+        """
+        Return the summary of one window for one target, or None if it has no data.
+        """
+        windows = self.targets.get(target)
+        if windows is None or window not in windows:
+            return None
+        return windows[window].summary()
+
+    def snapshot(self):
+        """
+        Return {target: {window: summary}} for every target.
+        """
+        now = monotonic()
+        return {
+            target: {name: window.summary(now) for name, window in windows.items()}
+            for target, windows in self.targets.items()
+        }
+
+
+class WindowRuleState:
+    """
+    Tracks which (target, window, metric, threshold) rules are currently firing so each
+    rule alerts once when it starts and once when it clears.
+    """
+
+    def __init__(self, rules=None):
+        self.rules = list(WINDOW_RULES if rules is None else rules)
+        self.firing = set()
+
+    def set_rules(self, rules):
+        """
+        Replace the rule list; rules that are kept keep their firing state.
+        """
+        self.rules = list(rules)
+        self.firing &= set(self.rules)
+
+    def evaluate(self, sliding: SlidingStats):
+        """
+        Return (started, cleared) lists of (rule, value) for rules whose state changed.
+        """
+        started, cleared = [], []
+        for rule in self.rules:
+            target, window, metric, threshold = rule
+            summary = sliding.query(target, window)
+            if summary is None or summary["samples"] < MIN_RULE_SAMPLES:
+                continue
+            value = summary[metric]
+            if value > threshold and rule not in self.firing:
+                self.firing.add(rule)
+                started.append((rule, value))
+            elif value <= threshold and rule in self.firing:
+                self.firing.discard(rule)
+                cleared.append((rule, value))
+        return started, cleared
@@ -0,0 +1,45 @@
+import random
+
+from internet_monitor.baseline import HIGH_PING_THRESHOLD, LatencyBaseline, WARMUP_SAMPLES
+
+BUCKET = 5
+
+
+def warmed_baseline(rng, samples=3600):
+    baseline = LatencyBaseline()
+    for _ in range(samples):
+        baseline.observe("1.1.1.1", 20 + rng.uniform(-2, 2), BUCKET)
+    return baseline
+
+
+def test_falls_back_to_fixed_threshold_until_warmed_up():
+    baseline = LatencyBaseline()
+    assert baseline.threshold("1.1.1.1", BUCKET) == (HIGH_PING_THRESHOLD, False)
+    for _ in range(WARMUP_SAMPLES - 1):
+        assert baseline.observe("1.1.1.1", 600, BUCKET) is True
+    assert baseline.observe("1.1.1.1", None, BUCKET) is None
+
+
+def test_sustained_step_change_keeps_alerting():
+    rng = random.Random(1)
+    baseline = warmed_baseline(rng)
+    limit_before, warmed_up = baseline.threshold("1.1.1.1", BUCKET)
+    assert warmed_up and limit_before < 40
+    deviation = baseline.buckets[("1.1.1.1", BUCKET)][1]
+
+    # An hour of 10x normal latency must be flagged from the first sample to the last
+    flags = [baseline.observe("1.1.1.1", rng.uniform(200, 300), BUCKET) for _ in range(3600)]
+    assert all(flags)
+    assert baseline.buckets[("1.1.1.1", BUCKET)][1] == deviation
+    assert baseline.threshold("1.1.1.1", BUCKET)[0] < 200
+
+
+def test_permanent_change_is_eventually_adopted():
+    rng = random.Random(2)
+    baseline = warmed_baseline(rng)
+    for _ in range(50_000):
+        if not baseline.observe("1.1.1.1", 250, BUCKET):
+            break
+    else:
+        raise AssertionError("a permanent 250 ms link was never adopted as normal")
+    assert baseline.observe("1.1.1.1", 250, BUCKET) is False
@@ -0,0 +1,76 @@
+import sqlite3
+
+import pytest
+
+from internet_monitor import db_manager as db
+from internet_monitor.db_manager import DatabaseManager, get_last_heartbeat, init_db
+
+# Schema written by releases before integer timestamps, without system_downtime_seconds
+LEGACY_SCHEMA = """
+    CREATE TABLE event_log (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        event_type TEXT NOT NULL,
+        timestamp DATETIME DEFAULT (datetime('now','localtime')),
+        details TEXT
+    );
+    CREATE TABLE daily_stats (
+        date DATE, time TIME, uptime_seconds REAL, downtime_seconds REAL,
+        high_ping_count INTEGER, high_ping_seconds REAL, internet_failures INTEGER,
+        total_pings INTEGER, failed_pings INTEGER, average_ping REAL, max_ping REAL,
+        longest_downtime REAL, PRIMARY KEY (date, time)
+    );
+    CREATE TABLE heartbeat (id INTEGER PRIMARY KEY CHECK (id=1), last_heartbeat DATETIME);
+    INSERT INTO event_log (event_type, timestamp, details) VALUES ('Internet Down', '2025-03-01 10:00:00', 'x');
+    INSERT INTO daily_stats VALUES ('2025-03-01', '18:00:00', 1, 2, 3, 4, 5, 6, 7, 8, 9, 10);
+    INSERT INTO heartbeat VALUES (1, '2025-03-01 18:30:00');
+"""
+
+
+@pytest.fixture
+def legacy_db(tmp_path):
+    path = str(tmp_path / "netpulse.db")
+    conn = sqlite3.connect(path)
+    conn.executescript(LEGACY_SCHEMA)
+    conn.close()
+    return path
+
+
+def tables(conn):
+    return {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+
+
+def test_migrates_legacy_schema_with_missing_columns(legacy_db):
+    db_manager = DatabaseManager(legacy_db)
+    init_db(db_manager)
+    conn = db_manager.conn
+
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == db.SCHEMA_VERSION
+    assert not any(name.endswith("_legacy") for name in tables(conn))
+    assert conn.execute("SELECT event_type, details FROM event_log").fetchall() == [("Internet Down", "x")]
+    ts, uptime, system_downtime = conn.execute(
+        "SELECT ts, uptime_seconds, system_downtime_seconds FROM daily_stats"
+    ).fetchone()
+    assert isinstance(ts, int) and uptime == 1 and system_downtime is None
+    assert isinstance(get_last_heartbeat(db_manager), int)
+    db_manager.close()
+
+
+def test_failed_migration_rolls_back_and_raises(legacy_db, monkeypatch):
+    migrate = db._migrate_to_integer_time
+
+    def failing_migration(cursor):
+        migrate(cursor)
+        raise sqlite3.OperationalError("disk I/O error")
+
+    monkeypatch.setattr(db, "_migrate_to_integer_time", failing_migration)
+    db_manager = DatabaseManager(legacy_db)
+    with pytest.raises(sqlite3.OperationalError):
+        init_db(db_manager)
+    db_manager.close()
+
+    conn = sqlite3.connect(legacy_db)
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == 0
+    assert tables(conn) >= {"event_log", "daily_stats", "heartbeat"}
+    assert not any(name.endswith("_legacy") for name in tables(conn))
+    assert conn.execute("SELECT timestamp FROM event_log").fetchall() == [("2025-03-01 10:00:00",)]
+    conn.close()
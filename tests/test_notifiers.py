@@ -0,0 +1,271 @@
+import asyncio
+import json
+import time
+
+from internet_monitor.notifiers import (
+    NotifierRegistry,
+    SinkWorker,
+    SmtpNotifier,
+    SyslogNotifier,
+    TelegramNotifier,
+    WebhookNotifier,
+)
+
+
+def run(coro):
+    return asyncio.run(asyncio.wait_for(coro, 10))
+
+
+class HttpStandIn:
+    """
+    Minimal HTTP server that records POST bodies and answers with a fixed status.
+    """
+
+    def __init__(self, status=200):
+        self.status = status
+        self.bodies = []
+        self.received = asyncio.Event()
+
+    async def start(self):
+        self.server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        return f"http://127.0.0.1:{self.server.sockets[0].getsockname()[1]}/hook"
+
+    async def _handle(self, reader, writer):
+        head = await reader.readuntil(b"\r\n\r\n")
+        length = 0
+        for line in head.decode("latin-1").split("\r\n"):
+            if line.lower().startswith("content-length:"):
+                length = int(line.split(":", 1)[1])
+        self.bodies.append(json.loads(await reader.readexactly(length)))
+        self.received.set()
+        writer.write(f"HTTP/1.1 {self.status} X\r\nContent-Length: 0\r\nConnection: close\r\n\r\n".encode())
+        await writer.drain()
+        writer.close()
+
+    def close(self):
+        self.server.close()
+
+
+class SyslogStandIn(asyncio.DatagramProtocol):
+    def __init__(self):
+        self.datagrams = []
+
+    def datagram_received(self, data, addr):
+        self.datagrams.append(data.decode("utf-8"))
+
+
+class SmtpStandIn:
+    """
+    Just enough of SMTP for smtplib.send_message(); records each message's DATA.
+    """
+
+    def __init__(self):
+        self.messages = []
+
+    async def start(self):
+        self.server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        return self.server.sockets[0].getsockname()[1]
+
+    async def _handle(self, reader, writer):
+        writer.write(b"220 stand-in ESMTP\r\n")
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            command = line.decode().strip().upper()
+            if command.startswith("EHLO") or command.startswith("HELO"):
+                writer.write(b"250 stand-in\r\n")
+            elif command == "DATA":
+                writer.write(b"354 go ahead\r\n")
+                await writer.drain()
+                data = (await reader.readuntil(b"\r\n.\r\n")).decode()
+                self.messages.append(data)
+                writer.write(b"250 queued\r\n")
+            elif command == "QUIT":
+                writer.write(b"221 bye\r\n")
+                await writer.drain()
+                break
+            else:
+                writer.write(b"250 ok\r\n")
+            await writer.drain()
+        writer.close()
+
+    def close(self):
+        self.server.close()
+
+
+class FakeBot:
+    def __init__(self):
+        self.sent = []
+
+    async def send_message(self, chat_id, text, parse_mode=None):
+        self.sent.append((chat_id, text))
+
+
+def fake_telegram():
+    notifier = TelegramNotifier("token", "chat")
+    notifier.alerts.bot = FakeBot()
+    return notifier
+
+
+class RecordingSink:
+    """
+    Fails the first `failures` deliveries, optionally sleeps, and records when each
+    delivery was attempted.
+    """
+
+    def __init__(self, failures=0, delay=0):
+        self.failures = failures
+        self.delay = delay
+        self.attempts = []
+        self.delivered = []
+
+    async def deliver(self, message):
+        self.attempts.append(time.monotonic())
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        if len(self.attempts) <= self.failures:
+            raise ConnectionError("sink down")
+        self.delivered.append(message)
+
+
+def test_fan_out_reaches_every_protocol():
+    async def scenario():
+        http = HttpStandIn()
+        url = await http.start()
+        smtp = SmtpStandIn()
+        smtp_port = await smtp.start()
+        loop = asyncio.get_running_loop()
+        transport, syslog = await loop.create_datagram_endpoint(
+            SyslogStandIn, local_addr=("127.0.0.1", 0)
+        )
+        syslog_port = transport.get_extra_info("sockname")[1]
+        telegram = fake_telegram()
+
+        registry = NotifierRegistry()
+        options = {"min_interval": 0}
+        registry.register("webhook", WebhookNotifier(url), **options)
+        registry.register("syslog", SyslogNotifier("127.0.0.1", syslog_port), **options)
+        registry.register("smtp", SmtpNotifier("127.0.0.1", smtp_port, "np@example.com",
+                                               "ops@example.com"), **options)
+        registry.register("telegram", telegram, **options)
+
+        await registry.send_alert("🚨 *Internet Down*\nfirst")
+        await registry.send_alert("✅ *Internet Restored*\nsecond")
+        await registry.drain()
+        metrics = registry.metrics()
+        await registry.stop()
+        http.close()
+        smtp.close()
+        transport.close()
+        return http, smtp, syslog, telegram, metrics
+
+    http, smtp, syslog, telegram, metrics = run(scenario())
+
+    assert [body["markdown"] for body in http.bodies] == [
+        "🚨 *Internet Down*\nfirst", "✅ *Internet Restored*\nsecond"
+    ]
+    assert http.bodies[0]["text"] == "🚨 Internet Down\nfirst"
+    assert syslog.datagrams == [
+        "<12>netpulse: 🚨 Internet Down | first", "<12>netpulse: ✅ Internet Restored | second"
+    ]
+    assert len(smtp.messages) == 2 and "Subject: NetPulse alert" in smtp.messages[0]
+    assert [text for _, text in telegram.alerts.bot.sent] == [
+        "🚨 *Internet Down*\nfirst", "✅ *Internet Restored*\nsecond"
+    ]
+    assert all(m["sent"] == 2 and m["failed"] == 0 for m in metrics.values())
+
+
+def test_full_queue_drops_oldest():
+    async def scenario():
+        worker = SinkWorker("sink", RecordingSink(), queue_size=2)
+        for message in ("one", "two", "three"):
+            worker.submit(message)
+        queued = [worker.queue.get_nowait() for _ in range(worker.queue.qsize())]
+        return worker.stats["dropped"], queued
+
+    dropped, queued = run(scenario())
+    assert dropped == 1
+    assert queued == ["two", "three"]
+
+
+def test_retry_backs_off_then_delivers():
+    async def scenario():
+        sink = RecordingSink(failures=2)
+        worker = SinkWorker("flaky", sink, retry_backoff=0.05, min_interval=0)
+        worker.start()
+        worker.submit("hello")
+        await worker.queue.join()
+        await worker.stop()
+        return sink, worker.metrics()
+
+    sink, metrics = run(scenario())
+    assert sink.delivered == ["hello"]
+    assert metrics["retries"] == 2 and metrics["sent"] == 1 and metrics["failed"] == 0
+    first_gap = sink.attempts[1] - sink.attempts[0]
+    second_gap = sink.attempts[2] - sink.attempts[1]
+    assert first_gap >= 0.05
+    assert second_gap >= 0.1  # backoff doubled
+
+
+def test_gives_up_after_max_attempts():
+    async def scenario():
+        sink = RecordingSink(failures=10)
+        worker = SinkWorker("dead", sink, max_attempts=3, retry_backoff=0.01, min_interval=0)
+        worker.start()
+        worker.submit("lost")
+        await worker.queue.join()
+        await worker.stop()
+        return sink, worker.metrics()
+
+    sink, metrics = run(scenario())
+    assert len(sink.attempts) == 3
+    assert metrics["failed"] == 1 and metrics["sent"] == 0
+    assert metrics["last_error"] == "ConnectionError: sink down"
+
+
+def test_min_interval_spaces_deliveries():
+    async def scenario():
+        sink = RecordingSink()
+        worker = SinkWorker("limited", sink, min_interval=0.1)
+        worker.start()
+        for message in ("a", "b", "c"):
+            worker.submit(message)
+        await worker.queue.join()
+        await worker.stop()
+        return sink
+
+    sink = run(scenario())
+    assert sink.delivered == ["a", "b", "c"]
+    gaps = [later - earlier for earlier, later in zip(sink.attempts, sink.attempts[1:])]
+    assert all(gap >= 0.09 for gap in gaps)
+
+
+def test_dead_or_slow_sink_does_not_delay_others():
+    async def scenario():
+        dead = HttpStandIn(status=500)
+        url = await dead.start()
+        slow = RecordingSink(delay=2)
+        telegram = fake_telegram()
+
+        registry = NotifierRegistry()
+        registry.register("dead-webhook", WebhookNotifier(url), retry_backoff=1, min_interval=0)
+        registry.register("slow", slow, min_interval=0)
+        registry.register("telegram", telegram, min_interval=0)
+
+        started = time.monotonic()
+        await registry.send_alert("outage")
+        while not telegram.alerts.bot.sent:
+            await asyncio.sleep(0.01)
+        elapsed = time.monotonic() - started
+        await dead.received.wait()
+        metrics = registry.metrics()
+        await registry.stop()
+        dead.close()
+        return elapsed, metrics
+
+    elapsed, metrics = run(scenario())
+    assert elapsed < 0.5
+    assert metrics["telegram"]["sent"] == 1
+    assert metrics["slow"]["sent"] == 0
+    assert metrics["dead-webhook"]["sent"] == 0
@@ -0,0 +1,42 @@
+import asyncio
+import sqlite3
+
+from internet_monitor import retention
+from internet_monitor.db_manager import DatabaseManager, _create_tables, init_db
+
+
+def fill_and_free(conn):
+    conn.execute("CREATE TABLE junk (x)")
+    conn.executemany("INSERT INTO junk VALUES (?)", [("y" * 3000,)] * 200)
+    conn.commit()
+    conn.execute("DROP TABLE junk")
+    conn.commit()
+
+
+def run_retention(db_manager):
+    return asyncio.run(asyncio.wait_for(retention.run_retention(db_manager), 10))
+
+
+def test_vacuum_gives_pages_back_in_incremental_mode(tmp_path):
+    db_manager = DatabaseManager(str(tmp_path / "netpulse.db"))
+    init_db(db_manager)
+    fill_and_free(db_manager.conn)
+
+    report = run_retention(db_manager)
+    assert report["pages_freed"] > 0
+    assert db_manager.conn.execute("PRAGMA freelist_count").fetchone()[0] == 0
+    db_manager.close()
+
+
+def test_vacuum_skipped_when_incremental_mode_never_took_effect(tmp_path):
+    # e.g. the one-off VACUUM in init_db failed because the disk was full
+    path = str(tmp_path / "netpulse.db")
+    conn = sqlite3.connect(path)
+    _create_tables(conn.cursor())
+    fill_and_free(conn)
+    conn.close()
+
+    db_manager = DatabaseManager(path)
+    report = run_retention(db_manager)
+    assert report["pages_freed"] == 0
+    db_manager.close()
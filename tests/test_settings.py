@@ -0,0 +1,35 @@
+from internet_monitor import windows
+from internet_monitor.settings import DEFAULT_TARGETS, Settings
+
+
+def test_apply_reports_changed_values_and_bumps_version():
+    settings = Settings({"TARGETS": ["9.9.9.9"], "PING_INTERVAL": 5})
+    version = settings.version
+
+    changes = settings.apply({"TARGETS": ["9.9.9.9"], "PING_INTERVAL": 2})
+    assert changes == {"PING_INTERVAL": (5, 2)}
+    assert settings.version == version + 1
+    assert settings.apply({"TARGETS": ["9.9.9.9"], "PING_INTERVAL": 2}) == {}
+    assert settings.version == version + 1
+
+
+def test_invalid_value_keeps_current_setting():
+    settings = Settings({"PING_INTERVAL": 5})
+    assert settings.apply({"PING_INTERVAL": -1}) == {}
+    assert settings.ping_interval == 5
+
+
+def test_removed_key_reverts_to_default():
+    settings = Settings({
+        "TARGETS": ["9.9.9.9"],
+        "WINDOW_RULES": [["all", "1m", "max_ping", 300]],
+    })
+
+    changes = settings.apply({})
+    assert changes == {
+        "TARGETS": (["9.9.9.9"], DEFAULT_TARGETS),
+        "WINDOW_RULES": ([("all", "1m", "max_ping", 300)], windows.WINDOW_RULES),
+    }
+    assert settings.targets == DEFAULT_TARGETS
+    assert settings.targets is not DEFAULT_TARGETS
+    assert settings.window_rules == windows.WINDOW_RULES
@@ -0,0 +1,208 @@
+import asyncio
+import socket
+import struct
+
+import pytest
+
+from internet_monitor import tracer
+from internet_monitor.tracer import (
+    IcmpProber,
+    PathTracer,
+    build_echo_request,
+    format_trace,
+    parse_icmp_packet,
+    parse_ttl_reply,
+)
+
+
+def run(coro):
+    return asyncio.run(asyncio.wait_for(coro, 10))
+
+
+class SimulatedPath:
+    """
+    Injected probe: hops 1..destination_ttl-1 answer "TTL expired" (no RTT), the destination
+    answers with an RTT, and hops in `silent` never answer.
+    """
+
+    def __init__(self, destination_ttl=5, silent=(), reachable=True):
+        self.destination_ttl = destination_ttl
+        self.silent = set(silent)
+        self.reachable = reachable
+        self.calls = []
+
+    async def __call__(self, host, ttl):
+        self.calls.append(ttl)
+        if ttl in self.silent:
+            return None, None, False
+        if ttl < self.destination_ttl:
+            return f"10.0.{ttl}.1", None, False
+        if ttl == self.destination_ttl and self.reachable:
+            return host, 12.0 + ttl, True
+        return None, None, False
+
+
+def test_parse_windows_ttl_expired():
+    output = (
+        "\r\nPinging 8.8.8.8 with 32 bytes of data:\r\n"
+        "Reply from 192.168.1.1: TTL expired in transit.\r\n"
+    )
+    assert parse_ttl_reply(output) == ("192.168.1.1", None, False)
+
+
+def test_parse_windows_echo_reply():
+    assert parse_ttl_reply("Reply from 8.8.8.8: bytes=32 time=14ms TTL=117\r\n") == ("8.8.8.8", 14.0, True)
+    assert parse_ttl_reply("Reply from 8.8.8.8: bytes=32 time<1ms TTL=117\r\n") == ("8.8.8.8", 1.0, True)
+
+
+def test_parse_timeout_and_unix_ttl_exceeded():
+    assert parse_ttl_reply("Request timed out.\r\n") == (None, None, False)
+    assert parse_ttl_reply("From 10.0.0.1 icmp_seq=1 Time to live exceeded\n") == ("10.0.0.1", None, False)
+
+
+def test_trace_truncates_to_destination(monkeypatch):
+    monkeypatch.setattr(tracer, "ROUND_INTERVAL", 0)
+    monkeypatch.setattr(tracer, "TRACE_ROUNDS", 3)
+    path = SimulatedPath(destination_ttl=5)
+
+    async def scenario():
+        trace = PathTracer(path).start("8.8.8.8")
+        await trace.task
+        return trace.summary()
+
+    summary = run(scenario())
+    # The first round probes every TTL at once; later rounds stop at the destination
+    assert path.calls.count(6) == 1 and path.calls.count(tracer.MAX_HOPS) == 1
+    assert path.calls.count(5) == 3
+    assert summary["reached"] and summary["rounds"] == 3
+    assert [hop["ttl"] for hop in summary["hops"]] == [1, 2, 3, 4, 5]
+    assert summary["hops"][0] == {"ttl": 1, "address": "10.0.1.1", "loss": 0.0,
+                                  "avg": None, "best": None, "worst": None}
+    assert summary["hops"][-1]["avg"] == 17.0
+
+
+def test_unreached_trace_trims_silent_tail(monkeypatch):
+    monkeypatch.setattr(tracer, "ROUND_INTERVAL", 0)
+    monkeypatch.setattr(tracer, "TRACE_ROUNDS", 1)
+    path = SimulatedPath(destination_ttl=4, silent={2}, reachable=False)
+
+    async def scenario():
+        trace = PathTracer(path).start("1.1.1.1")
+        await trace.task
+        return trace.summary()
+
+    summary = run(scenario())
+    assert not summary["reached"]
+    assert [(hop["ttl"], hop["address"]) for hop in summary["hops"]] == [
+        (1, "10.0.1.1"), (2, None), (3, "10.0.3.1")
+    ]
+    text = format_trace(summary)
+    assert " 2  *" in text
+    assert "Destination not reached; last responding hop: 10.0.3.1" in text
+
+
+def test_format_trace_shows_rtt_only_where_measured():
+    summary = {
+        "target": "8.8.8.8",
+        "rounds": 2,
+        "reached": True,
+        "hops": [
+            {"ttl": 1, "address": "10.0.1.1", "loss": 50.0, "avg": None, "best": None, "worst": None},
+            {"ttl": 2, "address": "8.8.8.8", "loss": 0.0, "avg": 14.0, "best": 13.0, "worst": 15.0},
+        ],
+    }
+    lines = format_trace(summary).splitlines()
+    assert lines[0] == "Path to 8.8.8.8 (2 rounds)"
+    summary["mode"] = tracer.MODE_PING
+    assert format_trace(summary).splitlines()[0] == "Path to 8.8.8.8 (2 rounds, system ping)"
+    assert lines[1] == " 1  10.0.1.1        loss  50.0%"
+    assert lines[2] == " 2  8.8.8.8         loss   0.0%  avg   14.0ms  worst   15.0ms"
+
+
+def test_concurrency_cap_and_stop():
+    release = None
+
+    async def blocked_probe(host, ttl):
+        await release.wait()
+        return None, None, False
+
+    async def scenario():
+        nonlocal release
+        release = asyncio.Event()
+        path_tracer = PathTracer(blocked_probe, max_concurrent=2)
+        first = path_tracer.start("a")
+        second = path_tracer.start("b")
+        refused = path_tracer.start("c")
+        await asyncio.sleep(0)
+
+        summary = await first.stop()
+        after_stop = len(path_tracer.active)
+        third = path_tracer.start("c")
+
+        await second.stop()
+        await third.stop()
+        return refused, summary, after_stop, third, path_tracer.active
+
+    refused, summary, after_stop, third, active = run(scenario())
+    assert refused is None
+    assert summary == {"target": "a", "mode": None, "rounds": 0, "reached": False, "hops": []}
+    assert after_stop == 1
+    assert third is not None
+    assert active == set()
+
+
+def ip_header(source="10.0.0.1", destination="192.168.1.10"):
+    return struct.pack("!BBHHHBBH4s4s", 0x45, 0, 0, 0, 0, 64, socket.IPPROTO_ICMP, 0,
+                       socket.inet_aton(source), socket.inet_aton(destination))
+
+
+def test_echo_request_checksum_verifies():
+    request = build_echo_request(0x1234, 7)
+    assert request[0] == 8 and struct.unpack("!HH", request[4:8]) == (0x1234, 7)
+    # Summing a packet that includes its own checksum gives 0xFFFF
+    words = struct.unpack(f"!{len(request) // 2}H", request)
+    total = sum(words)
+    while total >> 16:
+        total = (total >> 16) + (total & 0xFFFF)
+    assert total == 0xFFFF
+
+
+def test_parse_icmp_echo_reply_and_time_exceeded():
+    reply = ip_header() + struct.pack("!BBHHH", 0, 0, 0, 0x1234, 7) + b"payload"
+    assert parse_icmp_packet(reply, 0x1234) == (7, True)
+    assert parse_icmp_packet(reply, 0x4321) is None
+
+    quoted = ip_header("192.168.1.10", "8.8.8.8") + build_echo_request(0x1234, 9)[:8]
+    expired = ip_header() + struct.pack("!BBHI", 11, 0, 0, 0) + quoted
+    assert parse_icmp_packet(expired, 0x1234) == (9, False)
+    assert parse_icmp_packet(expired, 0x4321) is None
+
+    # Someone else's echo request looping back to us is not an answer
+    request = ip_header() + build_echo_request(0x1234, 9)
+    assert parse_icmp_packet(request, 0x1234) is None
+    assert parse_icmp_packet(b"short", 0x1234) is None
+
+
+def test_path_tracer_reports_probe_mode():
+    async def scenario():
+        trace = PathTracer(SimulatedPath(), mode=tracer.MODE_PING).start("8.8.8.8")
+        return await trace.stop()
+
+    assert run(scenario())["mode"] == tracer.MODE_PING
+
+
+def test_icmp_prober_times_loopback_reply():
+    try:
+        prober = IcmpProber()
+    except OSError:
+        pytest.skip("raw ICMP sockets need elevated privileges")
+
+    async def scenario():
+        return await prober("127.0.0.1", 1)
+
+    try:
+        responder, rtt, reached = run(scenario())
+    finally:
+        prober.close()
+    assert responder == "127.0.0.1" and reached
+    assert 0 <= rtt < tracer.PROBE_TIMEOUT_MS